@@ -0,0 +1,149 @@
+import gc
+import json
+import os
+import subprocess  # nosec B404 - only runs git and this script
+import sys
+import tempfile
+import tracemalloc
+
+import swiftcode
+
+##############################################
+#            MEMORY BENCHMARK
+##############################################
+
+# Usage: python membench.py [file.swco] [--against REV]
+# Reports the bytes held per token, per AST node and per runtime value, next to
+# the same figures for swiftcode.py at git revision REV (the first commit by default).
+
+BLOCK = '''
+variable total{i} = 0
+funct shape{i}(a, b)
+    variable items = [a, b, "item {i}", a * b + {i}]
+    if a > b then
+        give items + (a - b) / 2
+    else
+        give items + "no"
+    finish
+finish
+iterate j = 0 until 10 then variable total{i} = total{i} + lenl(shape{i}(j, {i}.5))
+'''
+
+VALUE_COUNT = 100000
+
+ROWS = [
+    ('token', 'tokens'),
+    ('node', 'nodes'),
+    ('Number', 'Number'),
+    ('String', 'String'),
+    ('List', 'List'),
+]
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def count_nodes():
+    return sum(
+        1 for obj in gc.get_objects()
+        if type(obj).__name__.endswith('Node') and type(obj).__name__ != 'VectorNode'
+    )
+
+def measure_values(make):
+    _, value_bytes = measure(lambda: [make(i) for i in range(VALUE_COUNT)])
+    # Ignore the list holding the values
+    return value_bytes - sys.getsizeof([None] * VALUE_COUNT)
+
+def report(fn, text):
+    (tokens, error), token_bytes = measure(lambda: swiftcode.Lexer(fn, text).make_tokens())
+    if error: return {'error': error.as_string()}
+
+    ast, node_bytes = measure(lambda: swiftcode.Parser(tokens).parse())
+    if ast.error: return {'error': ast.error.as_string()}
+    node_count = count_nodes()
+
+    # Number wraps an int that is not part of its own size
+    number_bytes = measure_values(lambda i: swiftcode.Number(i + 1000)) - VALUE_COUNT * sys.getsizeof(VALUE_COUNT)
+    return {
+        'chars': len(text),
+        'token_count': len(tokens),
+        'node_count': node_count,
+        'tokens': token_bytes / len(tokens),
+        'nodes': node_bytes / node_count,
+        'Number': number_bytes / VALUE_COUNT,
+        'String': measure_values(lambda i: swiftcode.String('')) / VALUE_COUNT,
+        'List': measure_values(lambda i: swiftcode.List([])) / VALUE_COUNT,
+    }
+
+def report_at(revision, args):
+    # Runs this script next to swiftcode.py as it was at the revision, so both sides
+    # measure the same program the same way
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ['swiftcode.py', 'string_with_arrows.py']:
+            source = subprocess.run(
+                ['git', 'show', f'{revision}:{name}'],
+                cwd=here, capture_output=True, check=True
+            ).stdout
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(source)
+        with open(os.path.abspath(__file__), 'rb') as f, open(os.path.join(directory, 'membench.py'), 'wb') as copy:
+            copy.write(f.read())
+
+        output = subprocess.run(
+            [sys.executable, os.path.join(directory, 'membench.py'), *args, '--json'],
+            cwd=here, capture_output=True, check=True, text=True
+        ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def first_commit():
+    return subprocess.run(
+        ['git', 'rev-list', '--max-parents=0', 'HEAD'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, check=True, text=True
+    ).stdout.split()[0]
+
+def main():
+    args = sys.argv[1:]
+    as_json = '--json' in args
+    if as_json: args.remove('--json')
+    revision = None
+    if '--against' in args:
+        index = args.index('--against')
+        revision = args[index + 1]
+        del args[index:index + 2]
+
+    if args:
+        fn = args[0]
+        with open(fn, 'r') as f:
+            text = f.read()
+    else:
+        fn = '<membench>'
+        text = ''.join(BLOCK.format(i=i) for i in range(500))
+
+    after = report(fn, text)
+    if as_json: return print(json.dumps(after))
+    if 'error' in after: return print(after['error'])
+
+    try:
+        before = report_at(revision or first_commit(), args)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        print(f'Could not measure the earlier revision: {e}')
+        before = {}
+    if 'error' in before:
+        print(f'The earlier revision could not parse the script:\n{before["error"]}')
+        before = {}
+
+    print(f'source:  {after["chars"]} chars, {after["token_count"]} tokens, {after["node_count"]} nodes')
+    print(f'{"":10}{"before":>10}{"after":>10}')
+    for label, key in ROWS:
+        old = f'{before[key]:.1f}' if key in before else '-'
+        print(f'  {label:8}{old:>10}{after[key]:>10.1f} bytes')
+
+if __name__ == '__main__':
+    main()
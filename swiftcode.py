@@ -5,18 +5,43 @@
 import datetime
 import time
 from string_with_arrows import string_with_arrows
-import string
 import os
 import math
+import re
+import bisect
+import operator
+import pickle  # nosec B403 - only reads the AST cache this module writes, see ASTCache.load
+import hashlib
+import zlib
+import gc
 import sys
+from collections import OrderedDict
 from dotenv import load_dotenv
 ##############################################
 #            CONSTANTS
 ##############################################
 
-DIGITS = '0123456789'
-LETTERS = string.ascii_letters
-LETTERS_DIGITS = LETTERS + DIGITS
+# Integers in this range share one preallocated Number (see Number.of)
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+
+# Folded strings longer than this (and integers with more bits) are left for run time
+FOLD_SIZE_LIMIT = 4096
+
+# Largest `->` function body (in nodes) the optimizer copies into its call sites
+INLINE_SIZE_LIMIT = 32
+
+# Evaluations in a row with two Number operands before a BinOpNode switches to its Number-only form
+QUICKEN_THRESHOLD = 8
+
+# Results kept per memo(f) function before the least recently used is dropped
+MEMO_CACHE_SIZE = 1024
+
+# Compiled programs engine="python" keeps before the least recently used is dropped
+PYTHON_CODE_CACHE_SIZE = 256
+
+# Identical traceback lines in a row that are shown before the rest are only counted
+TRACEBACK_REPEATS = 3
 
 
 ##############################################
@@ -51,6 +76,15 @@ class RTError(Error):
         super().__init__(pos_start, pos_end, 'Runtime Error', details)
         self.context = context
 
+    def set_pos(self, pos_start=None, pos_end=None):
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+        return self
+
+    def set_context(self, context=None):
+        self.context = context
+        return self
+
     def as_string(self):
         result = self.generate_traceback()
         result += f'\033[31mERROR:\033[0m {self.error_name}: {self.details}\n'
@@ -58,42 +92,123 @@ class RTError(Error):
         return result
 
     def generate_traceback(self):
-        result = ''
+        lines = []
         pos = self.pos_start
         ctx = self.context
 
+        location = f'\033[35mFile:\033[0m {self.pos_start.fn}, \033[35mLine:\033[0m {str(self.pos_end.ln + 1)}, \033[35min\033[0m '
         while ctx:
-            result = f'\033[35mFile:\033[0m {self.pos_start.fn}, \033[35mLine:\033[0m {str(self.pos_end.ln + 1)}, \033[35min\033[0m {ctx.display_name}\n' + result
+            lines.append(f'{location}{ctx.display_name}\n')
             pos = ctx.parent_entry_pos
             ctx = ctx.parent
+        lines.reverse()
+
+        # Runaway recursion leaves thousands of identical frames, so like Python
+        # show the first few of a run and count the rest
+        result = []
+        repeats = 0
+        for i, line in enumerate(lines):
+            if i and line == lines[i - 1]:
+                repeats += 1
+            else:
+                self.add_repeats(result, repeats)
+                repeats = 0
+            if repeats < TRACEBACK_REPEATS: result.append(line)
+        self.add_repeats(result, repeats)
 
-        return 'SwiftCode Traceback (most recent call last):\n' + result
+        return 'SwiftCode Traceback (most recent call last):\n' + ''.join(result)
+
+    def add_repeats(self, result, repeats):
+        hidden = repeats + 1 - TRACEBACK_REPEATS
+        if hidden > 0: result.append(f'  [Previous line repeated {hidden} more times]\n')
     
 
 ##############################################
 #               POSITION
 ##############################################
 
-class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
-        self.idx = idx
-        self.ln = ln
-        self.col = col
+class Source:
+    __slots__ = ('fn', 'ftxt', 'line_starts')
+
+    def __init__(self, fn, ftxt):
         self.fn = fn
         self.ftxt = ftxt
+        self.line_starts = None
 
-    def advance(self, current_char=None):
-        self.idx += 1
-        self.col += 1
+    def line_of(self, idx):
+        # Line offsets are only needed to report errors, so build them lazily
+        if self.line_starts is None:
+            self.line_starts = [0] + [i + 1 for i, char in enumerate(self.ftxt) if char == '\n']
+        return bisect.bisect_right(self.line_starts, idx) - 1
+
+class Position:
+    __slots__ = ('source', 'idx')
 
-        if current_char == "\n":
-            self.ln += 1
-            self.col = 0
+    def __init__(self, source, idx):
+        self.source = source
+        self.idx = idx
+
+    @property
+    def fn(self):
+        return self.source.fn
+
+    @property
+    def ftxt(self):
+        return self.source.ftxt
+
+    @property
+    def ln(self):
+        return self.source.line_of(self.idx)
 
+    @property
+    def col(self):
+        ln = self.ln
+        return self.idx - self.source.line_starts[ln]
+
+    def advance(self, current_char=None):
+        self.idx += 1
         return self
     
     def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+        return Position(self.source, self.idx)
+
+class EndPosition(Position):
+    # The end of a span sits on the line of its last character, even when that character is a newline
+    __slots__ = ()
+
+    @property
+    def ln(self):
+        return self.source.line_of(max(self.idx - 1, 0))
+
+    @property
+    def col(self):
+        if self.idx == 0: return 0
+        ln = self.ln
+        return self.idx - self.source.line_starts[ln]
+
+    def copy(self):
+        return EndPosition(self.source, self.idx)
+
+class Spanned:
+    # Tokens and nodes keep their span as offsets into a shared Source and build Positions on demand
+    __slots__ = ('source', 'start', 'end')
+
+    @property
+    def pos_start(self):
+        return Position(self.source, self.start)
+
+    @pos_start.setter
+    def pos_start(self, pos):
+        self.source = pos.source
+        self.start = pos.idx
+
+    @property
+    def pos_end(self):
+        return EndPosition(self.source, self.end)
+
+    @pos_end.setter
+    def pos_end(self, pos):
+        self.end = pos.idx
 
 
 ##############################################
@@ -101,268 +216,187 @@ class Position:
 ##############################################
 
 
-ST_INT = 'INT'
-ST_FLOAT = 'FLOAT'
-ST_STRING = 'STRING'
-ST_IDENTIFIER = 'IDENTIFIER'
-ST_KEYWORD = 'KEYWORD'
-ST_PLUS = 'PLUS'
-ST_MINUS = 'MINUS'
-ST_MUL = 'MUL'
-ST_DIV = 'DIV'
-ST_POW = 'POW'
-ST_EQ = 'EQ'
-ST_LPAREN = 'LPAREN'
-ST_RPAREN = 'RPAREN'
-ST_LSQUARE = 'LSQUARE'
-ST_RSQUARE = 'RSQUARE'
-ST_EE = 'EE'
-ST_NE = 'NE'
-ST_LT = 'LT'
-ST_GT = 'GT'
-ST_LTE = 'LTE'
-ST_GTE = 'GTE'
-ST_COMMA = 'COMMA'
-ST_ARROW = 'ARROW'
-ST_NEWLINE = 'NEWLINE'
-ST_SEQ = 'SEQ'
-ST_EOF = 'EOF'
-
-KEYWORDS = [
-    'variable', # Variable Declaration
-    'and', # Logical
-    'or', # Logical
-    'not', # Logical
-    'if', # Conditional
-    'then', # Conditional
-    'ifnot', # Conditional
-    'else', # Conditional
-    'iterate', # Loop
-    'until', # Loop
-    'step', # Loop
-    'while', # Loop
-    'funct', # Function
-    'finish',
-    'give',
-    'continue',
-    'destroy'
-]
-class Token:
-    def __init__(self, type_, value=None, pos_start=None, pos_end=None):
+ST_INT = 0
+ST_FLOAT = 1
+ST_STRING = 2
+ST_IDENTIFIER = 3
+ST_PLUS = 4
+ST_MINUS = 5
+ST_MUL = 6
+ST_DIV = 7
+ST_POW = 8
+ST_EQ = 9
+ST_LPAREN = 10
+ST_RPAREN = 11
+ST_LSQUARE = 12
+ST_RSQUARE = 13
+ST_EE = 14
+ST_NE = 15
+ST_LT = 16
+ST_GT = 17
+ST_LTE = 18
+ST_GTE = 19
+ST_COMMA = 20
+ST_ARROW = 21
+ST_NEWLINE = 22
+ST_SEQ = 23
+ST_EOF = 24
+
+# Every keyword is its own token kind, so the parser never compares strings
+KW_VARIABLE = 25 # Variable Declaration
+KW_AND = 26 # Logical
+KW_OR = 27 # Logical
+KW_NOT = 28 # Logical
+KW_IF = 29 # Conditional
+KW_THEN = 30 # Conditional
+KW_IFNOT = 31 # Conditional
+KW_ELSE = 32 # Conditional
+KW_ITERATE = 33 # Loop
+KW_UNTIL = 34 # Loop
+KW_STEP = 35 # Loop
+KW_WHILE = 36 # Loop
+KW_FUNCT = 37 # Function
+KW_FINISH = 38
+KW_GIVE = 39
+KW_CONTINUE = 40
+KW_DESTROY = 41
+
+KEYWORDS = {
+    'variable': KW_VARIABLE,
+    'and': KW_AND,
+    'or': KW_OR,
+    'not': KW_NOT,
+    'if': KW_IF,
+    'then': KW_THEN,
+    'ifnot': KW_IFNOT,
+    'else': KW_ELSE,
+    'iterate': KW_ITERATE,
+    'until': KW_UNTIL,
+    'step': KW_STEP,
+    'while': KW_WHILE,
+    'funct': KW_FUNCT,
+    'finish': KW_FINISH,
+    'give': KW_GIVE,
+    'continue': KW_CONTINUE,
+    'destroy': KW_DESTROY,
+}
+
+TOKEN_NAMES = [
+    'INT', 'FLOAT', 'STRING', 'IDENTIFIER', 'PLUS', 'MINUS', 'MUL', 'DIV', 'POW', 'EQ',
+    'LPAREN', 'RPAREN', 'LSQUARE', 'RSQUARE', 'EE', 'NE', 'LT', 'GT', 'LTE', 'GTE',
+    'COMMA', 'ARROW', 'NEWLINE', 'SEQ', 'EOF',
+] + ['KEYWORD'] * len(KEYWORDS)
+
+OPERATORS = {
+    '->': ST_ARROW,
+    '==': ST_EE,
+    '=`': ST_SEQ,
+    '!=': ST_NE,
+    '<=': ST_LTE,
+    '>=': ST_GTE,
+    '+': ST_PLUS,
+    '-': ST_MINUS,
+    '*': ST_MUL,
+    '/': ST_DIV,
+    '^': ST_POW,
+    '(': ST_LPAREN,
+    ')': ST_RPAREN,
+    '[': ST_LSQUARE,
+    ']': ST_RSQUARE,
+    ',': ST_COMMA,
+    '=': ST_EQ,
+    '<': ST_LT,
+    '>': ST_GT,
+}
+
+class Token(Spanned):
+    __slots__ = ('type', 'value')
+
+    def __init__(self, type_, value, source, start, end):
         self.type = type_
         self.value = value
-
-        if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = self.pos_start.copy()
-            self.pos_end.advance()
-
-        if pos_end:
-            self.pos_end = pos_end.copy()
+        self.source = source
+        self.start = start
+        self.end = end
         
     def matches(self, type_, value):
         return self.type == type_ and self.value == value
     def __repr__(self):
-        if self.value: return f'{self.type}:{self.value}'
-        return f'{self.type}'
+        if self.value: return f'{TOKEN_NAMES[self.type]}:{self.value}'
+        return f'{TOKEN_NAMES[self.type]}'
     
 ##############################################
 #               LEXER
 ##############################################
 
+# Group numbers of TOKEN_REGEX, read back through match.lastindex
+LX_SKIP = 1
+LX_NEWLINE = 2
+LX_IDENTIFIER = 3
+LX_NUMBER = 4
+LX_STRING = 5
+LX_OPERATOR = 6
+LX_BANG = 7
+LX_ILLEGAL = 8
+
+TOKEN_REGEX = re.compile('|'.join(f'({pattern})' for pattern in [
+    r'[ \t]+|@[^\n]*\n?', # Whitespace and comments (a comment swallows its newline)
+    r'[;\n]',
+    r'[A-Za-z][A-Za-z0-9_]*',
+    r'[0-9]+(?:\.[0-9]*)?',
+    r'"[^"]*"?',
+    '|'.join(re.escape(op) for op in sorted(OPERATORS, key=len, reverse=True)),
+    r'!',
+    r'[\s\S]',
+]))
+
 class Lexer:
     def __init__(self, fn, text):
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
-        self.current_char = None
-        self.advance()
-    
-    def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
+        self.source = Source(fn, text)
     
     def make_tokens(self):
         tokens = []
-
-        while self.current_char != None:
-            if self.current_char in ' \t':
-                self.advance()
-            elif self.current_char == '@':
-                self.skip_comment()
-            elif self.current_char in ';\n':
-                tokens.append(Token(ST_NEWLINE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char in LETTERS:
-                tokens.append(self.make_identifier())
-            elif self.current_char in DIGITS:
-                tokens.append(self.make_number())
-            elif self.current_char == '"':
-                tokens.append(self.make_string())
-            elif self.current_char == '+':
-                tokens.append(Token(ST_PLUS, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '-':
-                tokens.append(self.make_minus_or_arrow())
-            elif self.current_char == '*':
-                tokens.append(Token(ST_MUL, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '/':
-                tokens.append(Token(ST_DIV, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '^':
-                tokens.append(Token(ST_POW, pos_start=self.pos))
-                self.advance()
-
-            elif self.current_char == '(':
-                tokens.append(Token(ST_LPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ')':
-                tokens.append(Token(ST_RPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '[':
-                tokens.append(Token(ST_LSQUARE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ']':
-                tokens.append(Token(ST_RSQUARE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == '!':
-                tok, error = self.make_not_equals()
-                if error: return [], error
-                tokens.append(tok)
-            elif self.current_char == '=':
-                tokens.append(self.make_equals())
-            elif self.current_char == '<':
-                tokens.append(self.make_less_than())
-            elif self.current_char == '>':
-                tokens.append(self.make_greater_than())
-            elif self.current_char == ',':
-                tokens.append(Token(ST_COMMA, pos_start=self.pos))
-                self.advance()
-          #  elif self.current_char == '->':
-             #   tokens.append(self.make_minus_or_arrow())
-            #    self.advance()
-            else:
-                pos_start = self.pos.copy()
-                char = self.current_char
-                self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
-            
-        tokens.append(Token(ST_EOF, pos_start=self.pos))
-        return tokens, None
-    
-    def make_number(self):
-        num_str = ''
-        dot_count = 0
-        pos_start = self.pos.copy()
-
-        while self.current_char != None and self.current_char in DIGITS + '.':
-            if self.current_char == '.':
-                if dot_count == 1: break
-                dot_count += 1
-                num_str += '.'
-            else:
-                num_str += self.current_char
-            self.advance()
-        if dot_count == 0:
-            return Token(ST_INT, int(num_str), pos_start, self.pos)
-        else:
-            return Token(ST_FLOAT, float(num_str), pos_start, self.pos)
-
-    def make_string(self):
-        string = ''
-        pos_start = self.pos.copy()
-        escape_character = False
-        self.advance()
-
-        escape_characters = {
-            'n': '\n', #n
-            't': '\t' #t
-        }
-
-        while self.current_char != None and (self.current_char != '"' or escape_character):
-            if escape_character:
-                string += escape_characters.get(self.current_char, self.current_char)
-            else:
-                if self.current_char == '\\':
-                    escape_character = True
+        append = tokens.append
+        source = self.source
+        end = 0
+
+        for m in TOKEN_REGEX.finditer(self.text):
+            group = m.lastindex
+            idx, end = m.span()
+
+            if group == LX_SKIP:
+                pass
+            elif group == LX_IDENTIFIER:
+                word = m.group()
+                append(Token(KEYWORDS.get(word, ST_IDENTIFIER), word, source, idx, end))
+            elif group == LX_OPERATOR:
+                append(Token(OPERATORS[m.group()], None, source, idx, end))
+            elif group == LX_NEWLINE:
+                append(Token(ST_NEWLINE, None, source, idx, end))
+            elif group == LX_NUMBER:
+                num_str = m.group()
+                if '.' in num_str:
+                    append(Token(ST_FLOAT, float(num_str), source, idx, end))
                 else:
-                    string += self.current_char
-            self.advance()
-            escape_character = False
-        self.advance()
-        return Token(ST_STRING, string, pos_start, self.pos)
-        
-    def make_identifier(self):
-        id_str = ''
-        pos_start = self.pos.copy()
-        while self.current_char != None and self.current_char in LETTERS_DIGITS + '_':
-            id_str += self.current_char
-            self.advance()
-
-        tok_type = ST_KEYWORD if id_str in KEYWORDS else ST_IDENTIFIER
-        return Token(tok_type, id_str, pos_start, self.pos)
-    def make_minus_or_arrow(self):
-        tok_type = ST_MINUS
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '>':
-            self.advance()
-            tok_type = ST_ARROW
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-    def make_not_equals(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            return Token(ST_NE, pos_start=pos_start, pos_end=self.pos), None
-        self.advance()
-        return None, ExpectedCharError(pos_start, self.pos, "'=' after '!'")
-    
-    def make_equals(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            return Token(ST_EE, pos_start=pos_start, pos_end=self.pos)
-
-        if self.current_char == '`':
-            self.advance()
-            return Token(ST_SEQ, pos_start=pos_start, pos_end=self.pos)
-
-        return Token(ST_EQ, pos_start=pos_start, pos_end=self.pos)
-
-    def make_less_than(self):
-        tok_type = ST_LT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = ST_LTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-    def make_greater_than(self):
-        tok_type = ST_GT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = ST_GTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-    
-    def skip_comment(self):
-        self.advance()
-
-        while self.current_char != '\n':
-            self.advance()
+                    append(Token(ST_INT, int(num_str), source, idx, end))
+            elif group == LX_STRING:
+                string = m.group()
+                if len(string) > 1 and string[-1] == '"':
+                    string = string[1:-1]
+                else:
+                    # Unterminated strings run to the end of the file
+                    string = string[1:]
+                    end += 1
+                append(Token(ST_STRING, string.replace('\\', ''), source, idx, end))
+            elif group == LX_BANG:
+                return [], ExpectedCharError(Position(source, idx), Position(source, idx + 2), "'=' after '!'")
+            else:
+                return [], IllegalCharError(Position(source, idx), Position(source, end), "'" + m.group() + "'")
 
-        self.advance()
+        append(Token(ST_EOF, None, source, end, end + 1))
+        return tokens, None
 
 
 ##############################################
@@ -370,9 +404,12 @@ class Lexer:
 ##############################################
 
 
-class NumberNode:
-    def __init__(self, tok):
+class NumberNode(Spanned):
+    __slots__ = ('tok', 'value')
+
+    def __init__(self, tok, value=None):
         self.tok = tok
+        self.value = value
 
         self.pos_start = self.tok.pos_start
         self.pos_end = self.tok.pos_end
@@ -380,9 +417,12 @@ class NumberNode:
     def __repr__(self):
         return f'{self.tok}'
     
-class StringNode:
-    def __init__(self, tok):
+class StringNode(Spanned):
+    __slots__ = ('tok', 'value')
+
+    def __init__(self, tok, value=None):
         self.tok = tok
+        self.value = value
 
         self.pos_start = self.tok.pos_start
         self.pos_end = self.tok.pos_end
@@ -390,30 +430,43 @@ class StringNode:
     def __repr__(self):
         return f'{self.tok}'
     
-class ListNode:
+class ListNode(Spanned):
+    __slots__ = ('element_nodes', 'should_return_null')
+
     def __init__(self, element_nodes, pos_start, pos_end):
         self.element_nodes = element_nodes
+        self.should_return_null = False
         self.pos_start = pos_start
         self.pos_end = pos_end
     
-class VarAccessNode:
+class VarAccessNode(Spanned):
+    __slots__ = ('var_name_tok', 'slot', 'global_version')
+
     def __init__(self, var_name_tok):
         self.var_name_tok = var_name_tok
+        self.slot = None
+        self.global_version = -1
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.var_name_tok.pos_end
 
-class VarAssignNode:
+class VarAssignNode(Spanned):
+    __slots__ = ('var_name_tok', 'value_node', 'slot')
+
     def __init__(self, var_name_tok, value_node):
         self.var_name_tok = var_name_tok
         self.value_node = value_node
+        self.slot = None
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.value_node.pos_end
 
-class BinOpNode:
+class BinOpNode(Spanned):
+    __slots__ = ('left_node', 'op_tok', 'right_node', 'number_hits')
+
     def __init__(self, left_node, op_tok, right_node):
         self.left_node = left_node
         self.op_tok = op_tok
         self.right_node = right_node
+        self.number_hits = 0
 
         self.pos_start = self.left_node.pos_start
         self.pos_end = self.right_node.pos_end
@@ -421,7 +474,9 @@ class BinOpNode:
     def __repr__(self):
         return f'({self.left_node}, {self.op_tok}, {self.right_node})'
     
-class UnaryOpNode:
+class UnaryOpNode(Spanned):
+    __slots__ = ('op_tok', 'node')
+
     def __init__(self, op_tok, node):
         self.op_tok = op_tok
         self.node = node
@@ -432,7 +487,9 @@ class UnaryOpNode:
     def __repr__(self):
         return f'({self.op_tok}, {self.node})'
     
-class IfNode:
+class IfNode(Spanned):
+    __slots__ = ('cases', 'else_case')
+
     def __init__(self, cases, else_case):
         self.cases = cases
         self.else_case = else_case
@@ -440,18 +497,23 @@ class IfNode:
         self.pos_start = self.cases[0][0].pos_start
         self.pos_end = (self.else_case or self.cases[len(self.cases) - 1])[0].pos_end
 
-class IterateNode:
+class IterateNode(Spanned):
+    __slots__ = ('var_name_tok', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node', 'var_slot', 'should_return_null')
+
     def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_node, should_return_null):
         self.var_name_tok = var_name_tok
         self.start_value_node = start_value_node
         self.end_value_node = end_value_node
         self.step_value_node = step_value_node
         self.body_node = body_node
+        self.var_slot = None
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.body_node.pos_end
         self.should_return_null = should_return_null
 
-class WhileNode:
+class WhileNode(Spanned):
+    __slots__ = ('condition_node', 'body_node', 'should_return_null')
+
     def __init__(self, condition_node, body_node, should_return_null):
         self.condition_node = condition_node
         self.body_node = body_node
@@ -459,12 +521,16 @@ class WhileNode:
         self.pos_end = self.body_node.pos_end
         self.should_return_null = should_return_null
 
-class FuncDefNode:
+class FuncDefNode(Spanned):
+    __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node', 'should_auto_return', 'name_slot', 'local_names')
+
     def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
         self.var_name_tok = var_name_tok
         self.arg_name_toks = arg_name_toks
         self.body_node = body_node
         self.should_auto_return = should_auto_return
+        self.name_slot = None
+        self.local_names = None
 
         if self.var_name_tok:
             self.pos_start = self.var_name_tok.pos_start
@@ -475,7 +541,9 @@ class FuncDefNode:
 
         self.pos_end = self.body_node.pos_end
 
-class CallNode:
+class CallNode(Spanned):
+    __slots__ = ('node_to_call', 'arg_nodes')
+
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
@@ -487,23 +555,39 @@ class CallNode:
         else:
             self.pos_end = self.node_to_call.pos_end
 
-class ReturnNode: #give
+class ReturnNode(Spanned): #give
+    __slots__ = ('node_to_return',)
+
     def __init__(self, node_to_return, pos_start, pos_end):
         self.node_to_return = node_to_return
 
         self.pos_start = pos_start
         self.pos_end = pos_end
 
-class ContinueNode: #continue
+class ContinueNode(Spanned): #continue
+    __slots__ = ()
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
 
-class BreakNode: #destroy
+class BreakNode(Spanned): #destroy
+    __slots__ = ()
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
 
+class InlineNode(Spanned): # a call the optimizer replaced with the called function's body
+    __slots__ = ('name', 'body_node')
+
+    def __init__(self, name, body_node, pos_start, pos_end):
+        self.name = name
+        self.body_node = body_node
+
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
 ##############################################
 #               PARSE RESULT
 ##############################################
@@ -512,27 +596,11 @@ class ParseResult:
     def __init__(self):
         self.error = None
         self.node = None
-        self.last_registered_advance_count = 0
-        self.advance_count = 0
-        self.to_reverse_count = 0
-
-
-    def register_advancment(self):
-        self.last_registered_advance_count = 1
-        self.advance_count += 1
 
     def register(self, res):
-        self.last_registered_advance_count = res.advance_count
-        self.advance_count += res.advance_count
         if res.error: self.error = res.error
         return res.node
     
-    def try_register(self, res):
-        if res.error:
-            self.to_reverse_count = res.advance_count
-            return None
-        return self.register(res)
-    
     def success(self, node):
         self.node = node
         return self
@@ -545,10 +613,45 @@ class ParseResult:
 #               PARSER
 ##############################################
 
+# Binding power of the binary operators, loosest first. An operand of a
+# 'not' is parsed at PREC_COMP, an operand of a unary '+'/'-' at PREC_POW.
+PREC_LOGIC = 1
+PREC_COMP = 2
+PREC_ARITH = 3
+PREC_TERM = 4
+PREC_POW = 5
+
+BINARY_PRECEDENCE = {
+    KW_AND: PREC_LOGIC,
+    KW_OR: PREC_LOGIC,
+    ST_EE: PREC_COMP,
+    ST_NE: PREC_COMP,
+    ST_LT: PREC_COMP,
+    ST_GT: PREC_COMP,
+    ST_LTE: PREC_COMP,
+    ST_GTE: PREC_COMP,
+    ST_SEQ: PREC_COMP,
+    ST_PLUS: PREC_ARITH,
+    ST_MINUS: PREC_ARITH,
+    ST_MUL: PREC_TERM,
+    ST_DIV: PREC_TERM,
+    ST_POW: PREC_POW,
+}
+
+# Token kinds that can begin an expression or a statement. The parser only
+# commits to a statement when the next token is one of these, so it never
+# has to rewind.
+EXPR_START = {
+    ST_INT, ST_FLOAT, ST_STRING, ST_IDENTIFIER, ST_PLUS, ST_MINUS, ST_LPAREN, ST_LSQUARE,
+    KW_VARIABLE, KW_NOT, KW_IF, KW_ITERATE, KW_WHILE, KW_FUNCT,
+}
+STATEMENT_START = EXPR_START | {KW_GIVE, KW_CONTINUE, KW_DESTROY}
+
 class Parser:
     def __init__(self, tokens):
         self.tokens = tokens
         self.tok_idx = -1
+        self.constants = {}
         self.advance()
     
     def advance(self,):
@@ -556,15 +659,15 @@ class Parser:
         if self.tok_idx < len(self.tokens):
             self.current_tok = self.tokens[self.tok_idx]
             return self.current_tok
-        
-    def reverse(self, amount=1):
-        self.tok_idx -= amount
-        self.update_current_tok()
-        return self.current_tok
-    
-    def update_current_tok(self):
-        if self.tok_idx >= 0 and self.tok_idx < len(self.tokens):
-            self.current_tok = self.tokens[self.tok_idx]
+
+    def constant(self, tok):
+        # Every literal with the same type and value shares one runtime value
+        key = (tok.type, tok.value)
+        value = self.constants.get(key)
+        if value is None:
+            value = String(tok.value) if tok.type == ST_STRING else Number.of(tok.value)
+            self.constants[key] = value
+        return value
 
 ###################################################
 
@@ -581,38 +684,30 @@ class Parser:
     def statements(self):
         res = ParseResult()
         statements = []
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         while self.current_tok.type == ST_NEWLINE:
-            res.register_advancment()
             self.advance()
 
         statement = res.register(self.statement())
         if res.error: return res
         statements.append(statement)
-        
-        more_statements = True
 
         while True:
             newline_count = 0
             while self.current_tok.type == ST_NEWLINE:
-                res.register_advancment()
                 self.advance()
                 newline_count += 1
-            if newline_count == 0:
-                more_statements = False
-            if not more_statements: break
-            statement = res.try_register(self.statement())
-            if not statement:
-                self.reverse(res.to_reverse_count)
-                more_statements = False
-                continue
+            # A line that cannot start a statement ends the block, and the caller checks what it is
+            if newline_count == 0 or self.current_tok.type not in STATEMENT_START: break
+            statement = res.register(self.statement())
+            if res.error: return res
             statements.append(statement)
 
         return res.success(ListNode(
             statements,
             pos_start,
-            self.current_tok.pos_end.copy()
+            self.current_tok.pos_end
         ))
 
     def if_expr(self):
@@ -629,20 +724,17 @@ class Parser:
         res = ParseResult()
         else_case = None
 
-        if self.current_tok.matches(ST_KEYWORD, 'else'):
-            res.register_advancment()
+        if self.current_tok.type == KW_ELSE:
             self.advance()
 
             if self.current_tok.type == ST_NEWLINE:
-                res.register_advancment()
                 self.advance()
 
                 statements = res.register(self.statements())
                 if res.error: return res
                 else_case = (statements, True)
 
-                if self.current_tok.matches(ST_KEYWORD, 'finish'):
-                    res.register_advancment()
+                if self.current_tok.type == KW_FINISH:
                     self.advance()
                 else:
                     return res.failiure(InvalidSyntaxError(
@@ -658,7 +750,7 @@ class Parser:
         res = ParseResult()
         cases, else_case = [], None
 
-        if self.current_tok.matches(ST_KEYWORD, 'ifnot'):
+        if self.current_tok.type == KW_IFNOT:
             all_cases = res.register(self.if_expr_b())
             if res.error: return res
             cases, else_case = all_cases
@@ -672,38 +764,34 @@ class Parser:
         cases = []
         else_case = None
 
-        if not self.current_tok.matches(ST_KEYWORD, case_keyword):
+        if self.current_tok.type != KEYWORDS[case_keyword]:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected {case_keyword}!"
             ))
         
-        res.register_advancment()
         self.advance()
 
         condition = res.register(self.expr())
         if res.error: return res
 
-        if not self.current_tok.matches(ST_KEYWORD, 'then'):
+        if self.current_tok.type != KW_THEN:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'then' after if statement"
             ))
         
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type == ST_NEWLINE:
-            res.register_advancment()
             self.advance()
 
             statements = res.register(self.statements())
             if res.error: return res
             cases.append((condition, statements, True))
 
-            if self.current_tok.matches(ST_KEYWORD, 'finish'):
-                res.register_advancment()
-                self.advance
+            if self.current_tok.type == KW_FINISH:
+                self.advance()
             else:
                 all_cases = res.register(self.if_expr_b_or_c())
                 if res.error: return res
@@ -723,12 +811,11 @@ class Parser:
     def iterate_expr(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(ST_KEYWORD, 'iterate'):
+        if self.current_tok.type != KW_ITERATE:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'iterate'"
             ))
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type != ST_IDENTIFIER:
@@ -737,7 +824,6 @@ class Parser:
                 "Expected identifier after 'iterate'"
             ))
         var_name = self.current_tok
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type != ST_EQ:
@@ -745,26 +831,23 @@ class Parser:
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 "Expected '=' after identifier"
             ))
-        res.register_advancment()
         self.advance()
 
         start_value = res.register(self.expr())
         if res.error: return res
 
-        if not self.current_tok.matches(ST_KEYWORD, 'until'):
+        if self.current_tok.type != KW_UNTIL:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 "Expected 'until' after start value"
             ))
-        res.register_advancment()
         self.advance()
 
         end_value = res.register(self.expr())
         if res.error: return res
 
 
-        if self.current_tok.matches(ST_KEYWORD, 'step'):
-            res.register_advancment()
+        if self.current_tok.type == KW_STEP:
             self.advance()
 
             step_value = res.register(self.expr())
@@ -772,28 +855,25 @@ class Parser:
         else:
             step_value = None
 
-        if not self.current_tok.matches(ST_KEYWORD, 'then'):
+        if self.current_tok.type != KW_THEN:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 "Expected 'then' after 'step' or 'until' value"
             ))
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type == ST_NEWLINE:
-            res.register_advancment()
             self.advance()
 
             body = res.register(self.statements())
             if res.error: return res
 
-            if not self.current_tok.matches(ST_KEYWORD, 'finish'):
+            if self.current_tok.type != KW_FINISH:
                 return res.failiure(InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected keyword 'finish'"
                 ))
             
-            res.register_advancment()
             self.advance()
 
             return res.success(IterateNode(var_name, start_value, end_value, step_value, body, True))
@@ -805,39 +885,35 @@ class Parser:
     def while_expr(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(ST_KEYWORD, 'while'):
+        if self.current_tok.type != KW_WHILE:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'while'"
             ))
-        res.register_advancment()
         self.advance()
 
         condition = res.register(self.expr())
         if res.error: return res
 
-        if not self.current_tok.matches(ST_KEYWORD, 'then'):
+        if self.current_tok.type != KW_THEN:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'then' after 'while'"
             ))
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type == ST_NEWLINE:
-            res.register_advancment()
             self.advance()
 
             body = res.register(self.statements())
             if res.error: return res
 
-            if not self.current_tok.matches(ST_KEYWORD, 'finish'):
+            if self.current_tok.type != KW_FINISH:
                 return res.failiure(InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     f"Expected keyword 'finish'"
                 ))
             
-            res.register_advancment()
             self.advance()
 
             return res.success(WhileNode(condition, body, True))
@@ -849,17 +925,15 @@ class Parser:
     def func_def(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(ST_KEYWORD, 'funct'):
+        if self.current_tok.type != KW_FUNCT:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected 'funct'"
             ))
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type == ST_IDENTIFIER:
             var_name_tok = self.current_tok
-            res.register_advancment()
             self.advance()
             if self.current_tok.type != ST_LPAREN:
                 return res.failiure(InvalidSyntaxError(
@@ -874,17 +948,14 @@ class Parser:
                     "Expected identifier or '(' after 'funct'"
                 ))
     
-        res.register_advancment()
         self.advance()
         arg_name_toks = []
 
         if self.current_tok.type == ST_IDENTIFIER:
             arg_name_toks.append(self.current_tok)
-            res.register_advancment()
             self.advance()
 
             while self.current_tok.type == ST_COMMA:
-                res.register_advancment()
                 self.advance()
  
                 if self.current_tok.type != ST_IDENTIFIER:
@@ -894,7 +965,6 @@ class Parser:
                     ))
                 
                 arg_name_toks.append(self.current_tok)
-                res.register_advancment()
                 self.advance()
 
             if self.current_tok.type != ST_RPAREN:
@@ -908,11 +978,9 @@ class Parser:
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     "Expected identifier or ')' after '('"
                 ))
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type == ST_ARROW:
-            res.register_advancment()
             self.advance()
             body = res.register(self.expr())
             if res.error: return res
@@ -929,19 +997,17 @@ class Parser:
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected '->' or a new line"
             ))
-        res.register_advancment()
         self.advance()
 
         body = res.register(self.statements())
         if res.error: return res
 
-        if not self.current_tok.matches(ST_KEYWORD, 'finish'):
+        if self.current_tok.type != KW_FINISH:
             return res.failiure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 f"Expected keyword 'finish' after statement"
             ))
         
-        res.register_advancment()
         self.advance()
 
         return res.success(FuncDefNode(
@@ -957,12 +1023,10 @@ class Parser:
         if res.error: return res
 
         if self.current_tok.type == ST_LPAREN:
-            res.register_advancment()
             self.advance()
             arg_nodes = []
 
             if self.current_tok.type == ST_RPAREN:
-                res.register_advancment()
                 self.advance()
             else:
                 arg_nodes.append(res.register(self.expr()))
@@ -972,7 +1036,6 @@ class Parser:
                         "Expected ')', 'variable', 'if', 'while', 'iterate', 'funct' an integer, a float, an identifier or '['"
                     ))
                 while self.current_tok.type == ST_COMMA:
-                    res.register_advancment()
                     self.advance()
 
                     arg_nodes.append(res.register(self.expr()))
@@ -983,7 +1046,6 @@ class Parser:
                         self.current_tok.pos_start, self.current_tok.pos_end,
                         "Expected ',' or ')' after function call arguments"
                     ))
-                res.register_advancment()
                 self.advance()
             return res.success(CallNode(atom, arg_nodes))
         return res.success(atom)
@@ -991,27 +1053,22 @@ class Parser:
         res = ParseResult()
         tok = self.current_tok
         if tok.type in (ST_INT, ST_FLOAT):
-            res.register_advancment()
             self.advance()
-            return res.success(NumberNode(tok))
+            return res.success(NumberNode(tok, self.constant(tok)))
         
-        if tok.type in ST_STRING:
-            res.register_advancment()
+        if tok.type == ST_STRING:
             self.advance()
-            return res.success(StringNode(tok))
+            return res.success(StringNode(tok, self.constant(tok)))
         
         elif tok.type == ST_IDENTIFIER:
-            res.register_advancment()
             self.advance()
             return res.success(VarAccessNode(tok))
         
         elif tok.type == ST_LPAREN:
-            res.register_advancment()
             self.advance()
             expr = res.register(self.expr())
             if res.error: return res
             if self.current_tok.type == ST_RPAREN:
-                res.register_advancment()
                 self.advance()
                 return res.success(expr)
             else:
@@ -1025,21 +1082,21 @@ class Parser:
             if res.error: return res
             return res.success(list_expr)
         
-        elif tok.matches(ST_KEYWORD, 'if'):
+        elif tok.type == KW_IF:
             if_expr = res.register(self.if_expr())
             if res.error: return res
             return res.success(if_expr)
         
-        elif tok.matches(ST_KEYWORD, 'iterate'):
+        elif tok.type == KW_ITERATE:
             iterate_expr = res.register(self.iterate_expr())
             if res.error: return res
             return res.success(iterate_expr)
 
-        elif tok.matches(ST_KEYWORD, 'while'):
+        elif tok.type == KW_WHILE:
             while_expr = res.register(self.while_expr())
             if res.error: return res
             return res.success(while_expr)  
-        elif tok.matches(ST_KEYWORD, 'funct'):
+        elif tok.type == KW_FUNCT:
             func_def = res.register(self.func_def())
             if res.error: return res
             return res.success(func_def)      
@@ -1048,13 +1105,10 @@ class Parser:
             "Expected an int, a float, an identifier, '+', '[', '-', '(', 'if', 'while', 'iterate', 'funct'"
         ))
     
-    def power(self):
-        return self.bin_op(self.call, (ST_POW, ), self.factor)
-    
     def list_expr(self):
         res = ParseResult()
         element_nodes = []
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         if self.current_tok.type != ST_LSQUARE:
             return res.failiure(InvalidSyntaxError(
@@ -1062,11 +1116,9 @@ class Parser:
                 "Expected '['"
             ))
 
-        res.register_advancment()
         self.advance()
 
         if self.current_tok.type == ST_RSQUARE:
-            res.register_advancment()
             self.advance()
         else:
             element_nodes.append(res.register(self.expr()))
@@ -1077,7 +1129,6 @@ class Parser:
                 ))
 
             while self.current_tok.type == ST_COMMA:
-                res.register_advancment()
                 self.advance()
 
                 element_nodes.append(res.register(self.expr()))
@@ -1088,73 +1139,60 @@ class Parser:
                     self.current_tok.pos_start, self.current_tok.pos_end,
                     "Expected ',' or ']' after last element"
                 ))
-            res.register_advancment()
             self.advance()
 
-        return res.success(ListNode(element_nodes, pos_start, self.current_tok.pos_end.copy()))
+        return res.success(ListNode(element_nodes, pos_start, self.current_tok.pos_end))
    
-    def factor(self):
+    def binary_expr(self, min_prec):
         res = ParseResult()
         tok = self.current_tok
 
         if tok.type in (ST_PLUS, ST_MINUS):
-            res.register_advancment()
             self.advance()
-            factor = res.register(self.factor())
+            node = res.register(self.binary_expr(PREC_POW))
+            if res.error: return res
+            left = UnaryOpNode(tok, node)
+        elif tok.type == KW_NOT and min_prec <= PREC_COMP:
+            self.advance()
+            node = res.register(self.binary_expr(PREC_COMP))
+            if res.error: return res
+            left = UnaryOpNode(tok, node)
+        else:
+            left = res.register(self.call())
             if res.error: return res
-            return res.success(UnaryOpNode(tok, factor))
-
-
-        return self.power()
-
-    def term(self):
-        return self.bin_op(self.factor, (ST_MUL,ST_DIV))
-    
-    def arith_expr(self):
-        return self.bin_op(self.term, (ST_PLUS, ST_MINUS))
-
-    def comp_expr(self):
-        res = ParseResult()
 
-        if self.current_tok.matches(ST_KEYWORD, 'not'):
+        while True:
+            prec = BINARY_PRECEDENCE.get(self.current_tok.type)
+            if prec is None or prec < min_prec: break
             op_tok = self.current_tok
-            res.register_advancment()
             self.advance()
-
-            node = res.register(self.comp_expr())
+            # '^' is right associative, everything else binds to the left
+            right = res.register(self.binary_expr(prec if prec == PREC_POW else prec + 1))
             if res.error: return res
-            return res.success(UnaryOpNode(op_tok, node))
-        node = res.register(self.bin_op(self.arith_expr,((ST_EE, ST_NE, ST_LT, ST_GT, ST_LTE, ST_GTE, ST_SEQ))))
+            left = BinOpNode(left, op_tok, right)
 
-        if res.error:
-            return res.failiure(InvalidSyntaxError(
-                self.current_tok.pos_start, self.current_tok.pos_end,
-                "Expected an int, a float, an identifier, '+', '-', '(', '[' or 'not'"
-            ))
-        return res.success(node)
+        return res.success(left)
 
     def statement(self):
         res = ParseResult()
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
-        if self.current_tok.matches(ST_KEYWORD, "give"):
-            res.register_advancment()
+        if self.current_tok.type == KW_GIVE:
             self.advance()
 
-            expr = res.try_register(self.expr())
-            if not expr:
-                self.reverse(res.to_reverse_count)
-            return res.success(ReturnNode(expr, pos_start, self.current_tok.pos_start.copy()))
+            expr = None
+            if self.current_tok.type in EXPR_START:
+                expr = res.register(self.expr())
+                if res.error: return res
+            return res.success(ReturnNode(expr, pos_start, self.current_tok.pos_start))
 
-        if self.current_tok.matches(ST_KEYWORD, "continue"):
-            res.register_advancment()
+        if self.current_tok.type == KW_CONTINUE:
             self.advance()
-            return res.success(ContinueNode(pos_start, self.current_tok.pos_start.copy()))
+            return res.success(ContinueNode(pos_start, self.current_tok.pos_start))
         
-        if self.current_tok.matches(ST_KEYWORD, "destroy"):
-            res.register_advancment()
+        if self.current_tok.type == KW_DESTROY:
             self.advance()
-            return res.success(BreakNode(pos_start, self.current_tok.pos_start.copy()))
+            return res.success(BreakNode(pos_start, self.current_tok.pos_start))
 
         expr = res.register(self.expr())
         if res.error: 
@@ -1166,8 +1204,7 @@ class Parser:
         return res.success(expr)
     def expr(self):
         res = ParseResult()
-        if self.current_tok.matches(ST_KEYWORD, 'variable'):
-            res.register_advancment()
+        if self.current_tok.type == KW_VARIABLE:
             self.advance()
             if self.current_tok.type != ST_IDENTIFIER:
                 return res.failiure(InvalidSyntaxError(
@@ -1175,7 +1212,6 @@ class Parser:
                     'Expected identifier after variable declaration'
                 )) 
             var_name = self.current_tok
-            res.register_advancment()
             self.advance()
 
             if self.current_tok.type != ST_EQ:
@@ -1184,14 +1220,13 @@ class Parser:
                     "Expected '=' after variable name"
                 ))
             
-            res.register_advancment()
             self.advance()
             expr = res.register(self.expr())
             if res.error: return res
             return res.success(VarAssignNode(var_name, expr))
 
 
-        node =  res.register(self.bin_op(self.comp_expr, ((ST_KEYWORD, 'and'), (ST_KEYWORD, 'or'))))
+        node = res.register(self.binary_expr(PREC_LOGIC))
 
         if res.error: 
             return res.failiure(InvalidSyntaxError(
@@ -1200,113 +1235,747 @@ class Parser:
             ))
         return res.success(node)
     
-    def bin_op(self, func_a, ops, func_b=None):
-        if func_b == None:
-            func_b = func_a
-        res = ParseResult()
-        left = res.register(func_a())
-        if res.error: return res
+##############################################
+#               RESOLVER
+##############################################
 
-        while self.current_tok.type in ops or (self.current_tok.type, self.current_tok.value) in ops: 
-            op_tok = self.current_tok
-            res.register_advancment()
-            self.advance()
-            right = res.register(func_b())
-            if res.error: return res
-            left = BinOpNode(left, op_tok, right)
+class Resolver:
+    def resolve(self, node):
+        self.local_names = None
+        self.visit(node)
+        return node
 
-        return res.success(left)
+    def visit(self, node):
+        method_name = f'resolve_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_resolve_method)
+        method(node)
 
-##############################################
-#               RT RESULT
-##############################################
+    def no_resolve_method(self, node):
+        raise Exception(f'NO RESOLVE METHOD DEFINED!!! {type(node).__name__}')
 
-class RTResult:
-    def __init__(self):
-        self.reset()
-       # self.advance_count = 0
+    def declare(self, var_name):
+        if self.local_names is None: return None
+        if var_name not in self.local_names:
+            self.local_names[var_name] = len(self.local_names)
+        return self.local_names[var_name]
 
-    def reset(self):
-        self.value = None
-        self.error = None
-        self.func_return_value = None
-        self.loop_should_continue = False
-        self.loop_should_break = False
+    def lookup(self, var_name):
+        if self.local_names is None: return None
+        return self.local_names.get(var_name)
 
-   # def register_advancement(self):
-    #    self.advance_count += 1
-    
-    def register(self, res):
-       # self.advance_count += res.advance_count
-        self.error = res.error
-        self.func_return_value = res.func_return_value
-        self.loop_should_continue = res.loop_should_continue
-        self.loop_should_break = res.loop_should_break
-      #  if res.error: self.error = res.error
-        return res.value
-    def success(self, value):
-        self.reset()
-        self.value = value
-        return self
-    
-    def success_return(self, value):
-        self.reset()
-        self.func_return_value = value
-        return self
-    
-    def success_continue(self):
-        self.reset()
-        self.loop_should_continue = True
-        return self
-    
-    def success_break(self):
-        self.reset()
-        self.loop_should_break = True
-        return self
+    ##############################################
 
-    
-    def failiure(self, error):
-        self.reset()
-        #if not self.error or self.advance_count == 0:
-        #    self.error = error
-        self.error = error
-        return self
-    def should_return(self):
-        return (
-            self.error or
-            self.func_return_value or
-            self.loop_should_continue or
-            self.loop_should_break
-        )
+    def resolve_NumberNode(self, node):
+        pass
 
-##############################################
-#               VALUES
-##############################################
+    def resolve_StringNode(self, node):
+        pass
 
+    def resolve_ListNode(self, node):
+        for element_node in node.element_nodes:
+            self.visit(element_node)
 
+    def resolve_VarAccessNode(self, node):
+        node.slot = self.lookup(node.var_name_tok.value)
 
-class Value:
-    def __init__(self):
-        self.set_pos() 
-        self.set_context() 
+    def resolve_VarAssignNode(self, node):
+        node.slot = self.declare(node.var_name_tok.value)
+        self.visit(node.value_node)
 
-    def set_pos(self, pos_start=None, pos_end=None):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        return self
-    def set_context(self, context=None):
-        self.context = context
-        return self
-    def added_to(self, other):
-        return None, self.IllgalOperation(other)
-    def subbed_by(self, other):
-        return None, self.IllgalOperation(other)
-        
-    def multed_by(self, other):
-        return None, self.IllgalOperation(other)
-    def dived_by(self, other):
-        return None, self.IllgalOperation(other)
-    def powed_by(self, other):
+    def resolve_BinOpNode(self, node):
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def resolve_UnaryOpNode(self, node):
+        self.visit(node.node)
+
+    def resolve_IfNode(self, node):
+        for condition, expr, _ in node.cases:
+            self.visit(condition)
+            self.visit(expr)
+        if node.else_case:
+            self.visit(node.else_case[0])
+
+    def resolve_IterateNode(self, node):
+        node.var_slot = self.declare(node.var_name_tok.value)
+        self.visit(node.start_value_node)
+        self.visit(node.end_value_node)
+        if node.step_value_node:
+            self.visit(node.step_value_node)
+        self.visit(node.body_node)
+
+    def resolve_WhileNode(self, node):
+        self.visit(node.condition_node)
+        self.visit(node.body_node)
+
+    def resolve_FuncDefNode(self, node):
+        if node.var_name_tok:
+            node.name_slot = self.declare(node.var_name_tok.value)
+
+        outer_names = self.local_names
+        self.local_names = {}
+        for arg_name_tok in node.arg_name_toks:
+            self.declare(arg_name_tok.value)
+        self.visit(node.body_node)
+        node.local_names = self.local_names
+        self.local_names = outer_names
+
+    def resolve_CallNode(self, node):
+        self.visit(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.visit(arg_node)
+
+    def resolve_ReturnNode(self, node):
+        if node.node_to_return:
+            self.visit(node.node_to_return)
+
+    def resolve_ContinueNode(self, node):
+        pass
+
+    def resolve_BreakNode(self, node):
+        pass
+
+    def resolve_InlineNode(self, node):
+        self.visit(node.body_node)
+
+##############################################
+#               OPTIMIZER
+##############################################
+
+# Builtin names that always hold the same value unless a program rebinds them
+CONSTANT_NAMES = ('null', 'true', 'false', 'pimat', 'infimat', 'taumat')
+# Calling these can bind names the optimizer never sees
+BINDING_BUILTINS = ('import', 'frun')
+# Nodes that can be copied into a caller without changing what the body does:
+# nothing in them binds a name, returns, or calls a function that could see the arguments
+INLINE_NODES = (NumberNode, StringNode, ListNode, VarAccessNode, BinOpNode, UnaryOpNode, IfNode, CallNode, InlineNode)
+
+class Optimizer:
+    def __init__(self, level=1):
+        self.level = level
+
+    def optimize(self, node):
+        if self.level < 1: return node
+        self.bound_names = {}
+        self.used_names = set()
+        self.collect_names(node)
+        self.constants = self.known_constants()
+
+        self.program = node
+        self.defined_names = set()
+        self.arg_names = []
+        self.inline_functions = {}
+        return self.visit(node)
+
+    def visit(self, node):
+        method_name = f'optimize_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_optimize_method)
+        return method(node)
+
+    def no_optimize_method(self, node):
+        raise Exception(f'NO OPTIMIZE METHOD DEFINED!!! {type(node).__name__}')
+
+    def known_constants(self):
+        if self.used_names.intersection(BINDING_BUILTINS): return {}
+
+        constants = {}
+        for name in CONSTANT_NAMES:
+            value = global_symbol_table.get(name)
+            if name not in self.bound_names and value is BUILTIN_CONSTANTS[name]:
+                constants[name] = value
+        return constants
+
+    def collect_names(self, node):
+        if isinstance(node, (list, tuple)):
+            for child in node:
+                self.collect_names(child)
+            return
+        if not isinstance(node, Spanned) or isinstance(node, Token): return
+
+        if isinstance(node, VarAccessNode):
+            self.used_names.add(node.var_name_tok.value)
+        elif isinstance(node, (VarAssignNode, IterateNode)):
+            self.bind(node.var_name_tok.value)
+        elif isinstance(node, FuncDefNode):
+            if node.var_name_tok: self.bind(node.var_name_tok.value)
+            for arg_name_tok in node.arg_name_toks:
+                self.bind(arg_name_tok.value)
+
+        for slot in type(node).__slots__:
+            self.collect_names(getattr(node, slot, None))
+
+    def bind(self, name):
+        self.bound_names[name] = self.bound_names.get(name, 0) + 1
+
+    def literal(self, value, node):
+        # The folded literal covers the whole expression it replaces, so errors still point at it
+        if isinstance(value, String):
+            tok = Token(ST_STRING, value.value, node.source, node.start, node.end)
+            return StringNode(tok, value)
+        tok = Token(ST_INT if type(value.value) is int else ST_FLOAT, value.value, node.source, node.start, node.end)
+        return NumberNode(tok, value)
+
+    def is_literal(self, node):
+        return type(node) is NumberNode or type(node) is StringNode
+
+    def truth(self, node):
+        if self.is_literal(node): return node.value.is_true()
+        return None
+
+    def small_enough(self, op, left, right):
+        # Checked before folding, so huge powers and repeats are never computed at all
+        if isinstance(left, String):
+            if op == ST_PLUS and isinstance(right, String):
+                return len(left.value) + len(right.value) <= FOLD_SIZE_LIMIT
+            if op == ST_MUL and isinstance(right, Number):
+                return len(left.value) * right.value <= FOLD_SIZE_LIMIT
+            return True
+        if op == ST_POW and type(left.value) is int and type(right.value) is int:
+            return left.value.bit_length() * right.value <= FOLD_SIZE_LIMIT
+        return True
+
+    def fits_literal(self, value):
+        if isinstance(value, String): return len(value.value) <= FOLD_SIZE_LIMIT
+        if type(value.value) is int: return value.value.bit_length() <= FOLD_SIZE_LIMIT
+        return True
+
+    def fold_binary(self, node, left, right):
+        op = node.op_tok.type
+        if op == ST_SEQ:
+            if not isinstance(left, String): return None
+            method_name = 'get_string_eq'
+        else:
+            method_name = BINARY_OPS[op]
+
+        # Anything that fails is left alone, so it fails at run time exactly as before
+        try:
+            if not self.small_enough(op, left, right): return None
+            result, error = getattr(left, method_name)(right)
+        except Exception:
+            return None
+        if error or not self.fits_literal(result): return None
+        return result
+
+    def declare_statement(self, node):
+        # Top level statements run in order, so later statements can rely on what these define
+        if type(node) is VarAssignNode:
+            self.defined_names.add(node.var_name_tok.value)
+        elif type(node) is FuncDefNode and node.var_name_tok:
+            name = node.var_name_tok.value
+            self.defined_names.add(name)
+            if self.level >= 2 and self.can_inline(node):
+                self.inline_functions[name] = node
+
+    def can_inline(self, node):
+        if not node.should_auto_return or self.bound_names.get(node.var_name_tok.value) != 1: return False
+        if self.used_names.intersection(BINDING_BUILTINS): return False
+        size = self.inline_size(node.body_node)
+        return size is not None and size <= INLINE_SIZE_LIMIT
+
+    def inline_size(self, node):
+        if isinstance(node, (list, tuple)):
+            size = 0
+            for child in node:
+                child_size = self.inline_size(child)
+                if child_size is None: return None
+                size += child_size
+            return size
+        if not isinstance(node, Spanned) or isinstance(node, Token): return 0
+
+        if type(node) not in INLINE_NODES: return None
+        if type(node) is CallNode and not self.is_builtin(node.node_to_call): return None
+
+        size = 1
+        for slot in type(node).__slots__:
+            child_size = self.inline_size(getattr(node, slot))
+            if child_size is None: return None
+            size += child_size
+        return size
+
+    def is_builtin(self, node):
+        if type(node) is not VarAccessNode: return False
+        name = node.var_name_tok.value
+        return name not in self.bound_names and isinstance(global_symbol_table.get(name), BuiltInFunction)
+
+    def is_defined(self, name):
+        if self.arg_names and name in self.arg_names[-1]: return True
+        return name in self.defined_names or global_symbol_table.get(name) is not None
+
+    def inline_call(self, node):
+        if type(node.node_to_call) is not VarAccessNode: return None
+        func_def = self.inline_functions.get(node.node_to_call.var_name_tok.value)
+        if not func_def or len(func_def.arg_name_toks) != len(node.arg_nodes): return None
+
+        # Arguments are copied into the body wherever it reads them, which is only
+        # the same as evaluating them once up front if reading them cannot fail
+        for arg_node in node.arg_nodes:
+            if self.is_literal(arg_node): continue
+            if type(arg_node) is VarAccessNode and self.is_defined(arg_node.var_name_tok.value): continue
+            return None
+
+        args = {tok.value: arg_node for tok, arg_node in zip(func_def.arg_name_toks, node.arg_nodes, strict=True)}
+        body_node = self.substitute(func_def.body_node, args)
+        return InlineNode(func_def.var_name_tok.value, body_node, node.pos_start, node.pos_end)
+
+    def substitute(self, node, args):
+        if isinstance(node, list): return [self.substitute(child, args) for child in node]
+        if isinstance(node, tuple): return tuple(self.substitute(child, args) for child in node)
+        if not isinstance(node, Spanned) or isinstance(node, Token): return node
+
+        if type(node) is VarAccessNode and node.var_name_tok.value in args:
+            arg_node = args[node.var_name_tok.value]
+            return VarAccessNode(arg_node.var_name_tok) if type(arg_node) is VarAccessNode else arg_node
+
+        # Every call site gets its own copy, since the resolver fills in slots per scope
+        copy = object.__new__(type(node))
+        for slot in Spanned.__slots__ + type(node).__slots__:
+            setattr(copy, slot, self.substitute(getattr(node, slot), args))
+        return copy
+
+    def fold_unary(self, node, value):
+        op = node.op_tok.type
+        try:
+            if op == ST_MINUS:
+                result, error = value.multed_by(Number(-1))
+            elif op == KW_NOT:
+                result, error = value.notted()
+            else:
+                return value
+        except Exception:
+            return None
+        return None if error else result
+
+    ##############################################
+
+    def optimize_NumberNode(self, node):
+        return node
+
+    def optimize_StringNode(self, node):
+        return node
+
+    def optimize_ListNode(self, node):
+        element_nodes = []
+        for element_node in node.element_nodes:
+            element_nodes.append(self.visit(element_node))
+            if node is self.program: self.declare_statement(element_nodes[-1])
+            # Statements after give, continue or destroy never run
+            if type(element_nodes[-1]) in (ReturnNode, ContinueNode, BreakNode): break
+        node.element_nodes = element_nodes
+        return node
+
+    def optimize_VarAccessNode(self, node):
+        value = self.constants.get(node.var_name_tok.value)
+        if value is None: return node
+        return self.literal(value, node)
+
+    def optimize_VarAssignNode(self, node):
+        node.value_node = self.visit(node.value_node)
+        return node
+
+    def optimize_BinOpNode(self, node):
+        node.left_node = self.visit(node.left_node)
+        node.right_node = self.visit(node.right_node)
+        if not self.is_literal(node.left_node) or not self.is_literal(node.right_node): return node
+
+        result = self.fold_binary(node, node.left_node.value, node.right_node.value)
+        if result is None: return node
+        return self.literal(result, node)
+
+    def optimize_UnaryOpNode(self, node):
+        node.node = self.visit(node.node)
+        if not self.is_literal(node.node): return node
+
+        result = self.fold_unary(node, node.node.value)
+        if result is None: return node
+        return self.literal(result, node)
+
+    def optimize_IfNode(self, node):
+        cases = []
+        else_case = node.else_case
+        for condition, expr, should_return_null in node.cases:
+            condition = self.visit(condition)
+            truth = self.truth(condition)
+            if truth is False: continue
+            if truth is True:
+                # Nothing after a case that always runs can be reached
+                else_case = (expr, should_return_null)
+                break
+            cases.append((condition, self.visit(expr), should_return_null))
+
+        if else_case:
+            else_case = (self.visit(else_case[0]), else_case[1])
+
+        if cases:
+            node.cases = cases
+            node.else_case = else_case
+            return node
+        if not else_case:
+            return self.literal(Number.null, node)
+
+        expr, should_return_null = else_case
+        if not should_return_null: return expr
+        node.cases = [(self.literal(Number.true, expr), expr, True)]
+        node.else_case = None
+        return node
+
+    def optimize_IterateNode(self, node):
+        node.start_value_node = self.visit(node.start_value_node)
+        node.end_value_node = self.visit(node.end_value_node)
+        if node.step_value_node:
+            node.step_value_node = self.visit(node.step_value_node)
+        node.body_node = self.visit(node.body_node)
+        return node
+
+    def optimize_WhileNode(self, node):
+        node.condition_node = self.visit(node.condition_node)
+        node.body_node = self.visit(node.body_node)
+        return node
+
+    def optimize_FuncDefNode(self, node):
+        self.arg_names.append({tok.value for tok in node.arg_name_toks})
+        node.body_node = self.visit(node.body_node)
+        self.arg_names.pop()
+        return node
+
+    def optimize_CallNode(self, node):
+        node.node_to_call = self.visit(node.node_to_call)
+        node.arg_nodes = [self.visit(arg_node) for arg_node in node.arg_nodes]
+        if self.level < 2: return node
+
+        inline_node = self.inline_call(node)
+        if inline_node is None: return node
+        return self.visit(inline_node)
+
+    def optimize_ReturnNode(self, node):
+        if node.node_to_return:
+            node.node_to_return = self.visit(node.node_to_return)
+        return node
+
+    def optimize_ContinueNode(self, node):
+        return node
+
+    def optimize_BreakNode(self, node):
+        return node
+
+    def optimize_InlineNode(self, node):
+        node.body_node = self.visit(node.body_node)
+        # A body that folded to a literal cannot fail, so it needs no frame either
+        if self.is_literal(node.body_node): return node.body_node
+        return node
+
+##############################################
+#               RESULT USAGE
+##############################################
+
+class ResultUsage:
+    # Marks lists, loops and if branches whose value nobody reads with
+    # should_return_null, so the engines skip building results that are thrown away
+    def mark(self, node, used=True):
+        method_name = f'mark_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_mark_method)
+        method(node, used)
+        return node
+
+    def no_mark_method(self, node, used):
+        raise Exception(f'NO MARK METHOD DEFINED!!! {type(node).__name__}')
+
+    ##############################################
+
+    def mark_NumberNode(self, node, used):
+        pass
+
+    def mark_StringNode(self, node, used):
+        pass
+
+    def mark_ListNode(self, node, used):
+        if not used: node.should_return_null = True
+        for element_node in node.element_nodes:
+            self.mark(element_node, used)
+
+    def mark_VarAccessNode(self, node, used):
+        pass
+
+    def mark_VarAssignNode(self, node, used):
+        self.mark(node.value_node)
+
+    def mark_BinOpNode(self, node, used):
+        self.mark(node.left_node)
+        self.mark(node.right_node)
+
+    def mark_UnaryOpNode(self, node, used):
+        self.mark(node.node)
+
+    def mark_IfNode(self, node, used):
+        cases = []
+        for condition, expr, should_return_null in node.cases:
+            should_return_null = should_return_null or not used
+            self.mark(condition)
+            self.mark(expr, not should_return_null)
+            cases.append((condition, expr, should_return_null))
+        node.cases = cases
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            should_return_null = should_return_null or not used
+            self.mark(expr, not should_return_null)
+            node.else_case = (expr, should_return_null)
+
+    def mark_IterateNode(self, node, used):
+        if not used: node.should_return_null = True
+        self.mark(node.start_value_node)
+        self.mark(node.end_value_node)
+        if node.step_value_node:
+            self.mark(node.step_value_node)
+        self.mark(node.body_node, not node.should_return_null)
+
+    def mark_WhileNode(self, node, used):
+        if not used: node.should_return_null = True
+        self.mark(node.condition_node)
+        self.mark(node.body_node, not node.should_return_null)
+
+    def mark_FuncDefNode(self, node, used):
+        # Only `->` functions give back the value of their body
+        self.mark(node.body_node, node.should_auto_return)
+
+    def mark_CallNode(self, node, used):
+        self.mark(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.mark(arg_node)
+
+    def mark_ReturnNode(self, node, used):
+        if node.node_to_return:
+            self.mark(node.node_to_return)
+
+    def mark_ContinueNode(self, node, used):
+        pass
+
+    def mark_BreakNode(self, node, used):
+        pass
+
+    def mark_InlineNode(self, node, used):
+        self.mark(node.body_node, used)
+
+##############################################
+#               RT RESULT
+##############################################
+
+class RTResult:
+    def __init__(self):
+        self.reset()
+       # self.advance_count = 0
+
+    def reset(self):
+        self.value = None
+        self.error = None
+        self.func_return_value = None
+        self.loop_should_continue = False
+        self.loop_should_break = False
+
+   # def register_advancement(self):
+    #    self.advance_count += 1
+    
+    def register(self, res):
+       # self.advance_count += res.advance_count
+        self.error = res.error
+        self.func_return_value = res.func_return_value
+        self.loop_should_continue = res.loop_should_continue
+        self.loop_should_break = res.loop_should_break
+      #  if res.error: self.error = res.error
+        return res.value
+    def success(self, value):
+        self.reset()
+        self.value = value
+        return self
+    
+    def success_return(self, value):
+        self.reset()
+        self.func_return_value = value
+        return self
+    
+    def success_continue(self):
+        self.reset()
+        self.loop_should_continue = True
+        return self
+    
+    def success_break(self):
+        self.reset()
+        self.loop_should_break = True
+        return self
+
+    
+    def failiure(self, error):
+        self.reset()
+        #if not self.error or self.advance_count == 0:
+        #    self.error = error
+        self.error = error
+        return self
+    def should_return(self):
+        return (
+            self.error or
+            self.func_return_value or
+            self.loop_should_continue or
+            self.loop_should_break
+        )
+
+##############################################
+#               PERSISTENT VECTOR
+##############################################
+
+VECTOR_CHUNK = 32
+
+class VectorLeaf:
+    __slots__ = ('items', 'size', 'height')
+
+    def __init__(self, items):
+        self.items = items
+        self.size = len(items)
+        self.height = 0
+
+class VectorNode:
+    __slots__ = ('left', 'right', 'size', 'height')
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.size = left.size + right.size
+        self.height = max(left.height, right.height) + 1
+
+def vector_balance(left, right):
+    if left.height > right.height + 1:
+        if left.left.height >= left.right.height:
+            return VectorNode(left.left, VectorNode(left.right, right))
+        return VectorNode(VectorNode(left.left, left.right.left), VectorNode(left.right.right, right))
+    if right.height > left.height + 1:
+        if right.right.height >= right.left.height:
+            return VectorNode(VectorNode(left, right.left), right.right)
+        return VectorNode(VectorNode(left, right.left.left), VectorNode(right.left.right, right.right))
+    return VectorNode(left, right)
+
+def vector_concat(left, right):
+    if left is None: return right
+    if right is None: return left
+    if left.height == 0 and right.height == 0 and left.size + right.size <= VECTOR_CHUNK:
+        return VectorLeaf(left.items + right.items)
+    if left.height > right.height + 1:
+        return vector_balance(left.left, vector_concat(left.right, right))
+    if right.height > left.height + 1:
+        return vector_balance(vector_concat(left, right.left), right.right)
+    return VectorNode(left, right)
+
+def vector_split(node, index):
+    if node is None: return None, None
+    if index <= 0: return None, node
+    if index >= node.size: return node, None
+    if node.height == 0:
+        return VectorLeaf(node.items[:index]), VectorLeaf(node.items[index:])
+    if index < node.left.size:
+        left, right = vector_split(node.left, index)
+        return left, vector_concat(right, node.right)
+    left, right = vector_split(node.right, index - node.left.size)
+    return vector_concat(node.left, left), right
+
+def vector_build(leaves, start, end):
+    if end - start == 1: return leaves[start]
+    middle = (start + end) // 2
+    return VectorNode(vector_build(leaves, start, middle), vector_build(leaves, middle, end))
+
+class Vector:
+    __slots__ = ('root', 'tail', 'size')
+
+    def __init__(self, root=None, tail=()):
+        self.root = root
+        self.tail = tail
+        self.size = (root.size if root else 0) + len(tail)
+
+    @classmethod
+    def from_list(cls, items):
+        if not items: return EMPTY_VECTOR
+        tail_size = len(items) % VECTOR_CHUNK or VECTOR_CHUNK
+        split = len(items) - tail_size
+        leaves = [VectorLeaf(tuple(items[i:i + VECTOR_CHUNK])) for i in range(0, split, VECTOR_CHUNK)]
+        root = vector_build(leaves, 0, len(leaves)) if leaves else None
+        return cls(root, tuple(items[split:]))
+
+    def index(self, index):
+        index = operator.index(index)
+        if index < 0: index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('vector index out of range')
+        return index
+
+    def get(self, index):
+        index = self.index(index)
+        root_size = self.size - len(self.tail)
+        if index >= root_size: return self.tail[index - root_size]
+
+        node = self.root
+        while node.height:
+            if index < node.left.size:
+                node = node.left
+            else:
+                index -= node.left.size
+                node = node.right
+        return node.items[index]
+
+    def append(self, value):
+        if len(self.tail) < VECTOR_CHUNK:
+            return Vector(self.root, self.tail + (value,))
+        return Vector(vector_concat(self.root, VectorLeaf(self.tail)), (value,))
+
+    def concat(self, other):
+        if not other.size: return self
+        if other.root is None and len(self.tail) + len(other.tail) <= VECTOR_CHUNK:
+            return Vector(self.root, self.tail + other.tail)
+        root = vector_concat(self.root, VectorLeaf(self.tail)) if self.tail else self.root
+        return Vector(vector_concat(root, other.root), other.tail)
+
+    def remove(self, index):
+        index = self.index(index)
+        root_size = self.size - len(self.tail)
+        if index >= root_size:
+            index -= root_size
+            return Vector(self.root, self.tail[:index] + self.tail[index + 1:])
+
+        left, right = vector_split(self.root, index)
+        _, right = vector_split(right, 1)
+        return Vector(vector_concat(left, right), self.tail)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if node.height:
+                stack.append(node.right)
+                stack.append(node.left)
+            else:
+                yield from node.items
+        yield from self.tail
+
+EMPTY_VECTOR = Vector()
+
+##############################################
+#               VALUES
+##############################################
+
+
+
+class Value:
+    # Values carry no position or context: errors are placed by the node that was executing
+    __slots__ = ()
+
+    def added_to(self, other):
+        return None, self.IllgalOperation(other)
+    def subbed_by(self, other):
+        return None, self.IllgalOperation(other)
+        
+    def multed_by(self, other):
+        return None, self.IllgalOperation(other)
+    def dived_by(self, other):
+        return None, self.IllgalOperation(other)
+    def powed_by(self, other):
         return None, self.IllgalOperation(other)
     def get_comparison_eq(self, other):
         return None, self.IllgalOperation(other)
@@ -1326,8 +1995,8 @@ class Value:
         return None, self.IllgalOperation(other)
     def notted(self, other):
         return None, self.IllgalOperation(other)
-    def execute(self, args):
-        return RTResult().failiure(self.IllgalOperation())
+    def execute(self, args, context, pos_start, pos_end):
+        return RTResult().failiure(self.IllgalOperation().set_pos(pos_start, pos_end).set_context(context))
 
     def copy(self):
         raise Exception('No copy method defined')
@@ -1335,148 +2004,148 @@ class Value:
     def is_true(self):
         return False
 
+    def memo_key(self):
+        # Values without contents to compare are only equal to themselves
+        return self
+
     def IllgalOperation(self, other=None):
-            if not other: other = self
-            return None, RTError(
-                self.pos_start, other.pos_end,
-                'Illegal Operation',
-                self.context
-            )
+        return RTError(None, None, 'Illegal Operation', None)
 
 class Number(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
-        self.set_pos() 
-        self.set_context() 
 
-    def set_pos(self, pos_start=None, pos_end=None):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        return self
-    def set_context(self, context=None):
-        self.context = context
-        return self
     def added_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context), None
+            return Number(self.value + other.value), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def subbed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context), None
+            return Number(self.value - other.value), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
         
     def multed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value * other.value).set_context(self.context), None
+            return Number(self.value * other.value), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def dived_by(self, other):
         if isinstance(other, Number):
             if other.value == 0:
                 return None, RTError(
-                    other.pos_start, other.pos_end,
+                    None, None,
                     'Division by zero is not possible!',
-                    self.context
+                    None
                 )
-            return Number(self.value / other.value).set_context(self.context), None
+            return Number(self.value / other.value), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def powed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value ** other.value).set_context(self.context), None
+            return Number(self.value ** other.value), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
         
     def get_comparison_eq(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value == other.value)).set_context(self.context), None
+            return (Number.true if self.value == other.value else Number.false), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def get_comparison_ne(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value != other.value)).set_context(self.context), None
+            return (Number.true if self.value != other.value else Number.false), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def get_comparison_lt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value < other.value)).set_context(self.context), None
+            return (Number.true if self.value < other.value else Number.false), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def get_comparison_gt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value > other.value)).set_context(self.context), None
+            return (Number.true if self.value > other.value else Number.false), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def get_comparison_lte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value <= other.value)).set_context(self.context), None
+            return (Number.true if self.value <= other.value else Number.false), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def get_comparison_gte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value >= other.value)).set_context(self.context), None
+            return (Number.true if self.value >= other.value else Number.false), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def anded_by(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value and other.value)).set_context(self.context), None
+            return Number.of(int(self.value and other.value)), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def ored_by(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value or other.value)).set_context(self.context), None
+            return Number.of(int(self.value or other.value)), None
         else:
-            return None, self.IllgalOperation(self.pos_start, other.pos_end)
+            return None, self.IllgalOperation(other)
     def notted(self):
-        return Number(1 if self.value == 0 else 0).set_context(self.context), None
+        return (Number.true if self.value == 0 else Number.false), None
+
+    def of(value):
+        if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+            return Number.small_ints[value - SMALL_INT_MIN]
+        return Number(value)
+    of = staticmethod(of)
 
     def copy(self):
-        copy = Number(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
+        return Number(self.value)
     
     def is_true(self):
         return self.value != 0
+
+    def memo_key(self):
+        return (Number, type(self.value), self.value)
     def __repr__(self):
         return str(self.value)
 Number.null = Number(0)
 Number.false = Number(0)
 Number.true = Number(1)
+Number.small_ints = [Number(value) for value in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
 Number.math_PI = Number(math.pi)
 Number.math_inf = Number(math.inf)
 Number.math_tau = Number(math.tau)
 class String(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        super().__init__()
         self.value = value
 
     def added_to(self, other):
         if isinstance(other, String):
-            return String(self.value + other.value).set_context(self.context), None
+            return String(self.value + other.value), None
         else:
-            return None, Value.IllgalOperation(self.other)
+            return None, self.IllgalOperation(other)
     def multed_by(self, other):
         if isinstance(other, Number):
-            return String(self.value * other.value).set_context(self.context), None
+            return String(self.value * other.value), None
         else:
-            return None, Value.IllgalOperation(self.other)
+            return None, self.IllgalOperation(other)
         
     def get_string_eq(self, other):
         if isinstance(other, String):
-            return Number(int(self.value == other.value)).set_context(self.context), None
+            return (Number.true if self.value == other.value else Number.false), None
         return None, self.IllgalOperation(other)
 
     def is_true(self):
         return len(self.value) > 0
+
+    def memo_key(self):
+        return (String, self.value)
     
     def copy(self):
-        copy = String(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
+        return String(self.value)
     
     def __str__(self):
         return self.value
@@ -1486,240 +2155,349 @@ class String(Value):
 
 
 class List(Value):
+    __slots__ = ('vector',)
+
     def __init__(self, elements):
-        super().__init__()
-        self.elements = elements
+        self.vector = elements if isinstance(elements, Vector) else Vector.from_list(elements)
+
+    @property
+    def elements(self):
+        return list(self.vector)
 
     def added_to(self, other):
-        new_list = self.copy()
-        new_list.elements.append(other)
-        return new_list, None
+        return List(self.vector.append(other)), None
 
     def multed_by(self, other):
         if isinstance(other, List):
-            new_list = self.copy()
-            new_list.elements.extend(other.elements)
-            return new_list, None
+            return List(self.vector.concat(other.vector)), None
         else:
-            return None, Value.IllgalOperation(self.other)
+            return None, self.IllgalOperation(other)
     
     def subbed_by(self, other):
         if isinstance(other, Number):
-            new_list = self.copy()
             try:
-                new_list.elements.pop(other.value)
-                return new_list, None
+                return List(self.vector.remove(other.value)), None
             except:
                 return None, RTError(
-                    other.pos_start, other.pos_end,
+                    None, None,
                     'Element at this index could not be removed from list because index is out of bounds!',
-                    self.context
+                    None
                 )
         else:
-            return None, Value.IllgalOperation(self.other)
+            return None, self.IllgalOperation(other)
 
     def dived_by(self, other):
         if isinstance(other, Number):
             try:
-                return self.elements[other.value], None
+                return self.vector.get(other.value), None
             except:
                 return None, RTError(
-                    other.pos_start, other.pos_end,
+                    None, None,
                     'Element at this index does not exist!',
-                    self.context
+                    None
                 )
         else:
-            return None, Value.IllgalOperation(self.other)
+            return None, self.IllgalOperation(other)
+
+    def memo_key(self):
+        return (List, tuple(element.memo_key() for element in self.vector))
 
     def copy(self):
-        copy = List(self.elements)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
+        return List(self.vector)
     
     def __str__(self):
-        return f"{', '.join([str(x) for x in self.elements])}"
+        return f"{', '.join([str(x) for x in self.vector])}"
 
     def __repr__(self):
-        return f'[{", ".join([str(x) for x in self.elements])}]'
+        return f'[{", ".join([str(x) for x in self.vector])}]'
 
 class BaseFunction(Value):
+    __slots__ = ('name',)
+
     def __init__(self, name):
-        super().__init__()
         self.name = name or "<hidden>"
 
-    def generate_new_context(self):
-        new_context = Context(self.name, self.context)
-        new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+    def generate_new_context(self, context, pos_start=None):
+        new_context = Context(self.name, context, pos_start)
+        new_context.symbol_table = SymbolTable(context.symbol_table)
         return new_context
 
-    def check_args(self, arg_names, args):
+    def check_args(self, arg_names, args, pos_start, pos_end, context):
         res = RTResult()
         if len(args) > len(arg_names):
             return res.failiure(RTError(
-                self.pos_start, self.pos_end,
+                pos_start, pos_end,
                 f"{len(args) - len(arg_names)} too many arguments passed into '{self.name}'",
-                self.context
+                context
             ))
         if len(args) < len(arg_names):
             return res.failiure(RTError(
-                self.pos_start, self.pos_end,
+                pos_start, pos_end,
                 f"{len(arg_names) - len(args)} not enough arguments passed into '{self.name}'",
-                self.context
+                context
             ))
         return res.success(None)
 
     def populate_args(self, arg_names, args, exec_ctx):
         for i in range(len(args)):
-            arg_name = arg_names[i]
-            arg_value = args[i]
-            arg_value.set_context(exec_ctx)
-            exec_ctx.symbol_table.set(arg_name, arg_value)
+            exec_ctx.symbol_table.set(arg_names[i], args[i])
 
-    def check_and_populate_args(self, arg_names, args, exec_ctx):
+    def check_and_populate_args(self, arg_names, args, exec_ctx, pos_start, pos_end):
         res = RTResult()
-        res.register(self.check_args(arg_names, args))
+        res.register(self.check_args(arg_names, args, pos_start, pos_end, exec_ctx.parent))
         if res.should_return(): return res
         self.populate_args(arg_names,    args, exec_ctx)
         return res.success(None)
 class Function(BaseFunction):
-    def __init__(self, name, body_node, arg_name_toks, should_auto_return):
+    __slots__ = ('body_node', 'arg_name_toks', 'should_auto_return', 'local_names', 'arg_slots', 'frames')
+
+    def __init__(self, name, body_node, arg_name_toks, should_auto_return, local_names=None):
         super().__init__(name)
         self.body_node = body_node
         self.arg_name_toks = arg_name_toks
         self.should_auto_return = should_auto_return
-    def execute(self, args):
+        self.local_names = local_names
+        self.arg_slots = None if local_names is None else [local_names[name] for name in arg_name_toks]
+        # Frames of finished calls, ready to be reused by the next one
+        self.frames = []
+
+    def generate_new_context(self, context, pos_start=None):
+        if self.local_names is None: return super().generate_new_context(context, pos_start)
+        new_context = Context(self.name, context, pos_start)
+        new_context.symbol_table = Frame(self.local_names, context.symbol_table)
+        return new_context
+
+    def acquire_frame(self, context, pos_start):
+        if not self.frames: return self.generate_new_context(context, pos_start)
+        exec_ctx = self.frames.pop()
+        exec_ctx.parent = context
+        exec_ctx.parent_entry_pos = pos_start
+        exec_ctx.engine = context.engine
+        exec_ctx.optimize = context.optimize
+        exec_ctx.symbol_table.parent = context.symbol_table
+        return exec_ctx
+
+    def release_frame(self, exec_ctx):
+        # Only the bindings are dropped: a traceback may still walk the frame's callers
+        if self.local_names is None: return
+        exec_ctx.symbol_table.clear()
+        self.frames.append(exec_ctx)
+
+    def populate_args(self, arg_names, args, exec_ctx):
+        if self.arg_slots is None: return super().populate_args(arg_names, args, exec_ctx)
+        slots = exec_ctx.symbol_table.slots
+        for slot, arg in zip(self.arg_slots, args, strict=True):
+            slots[slot] = arg
+
+    def invoke(self, args, context, pos_start, pos_end):
+        if len(args) != len(self.arg_name_toks):
+            raise RTErrorException(self.check_args(self.arg_name_toks, args, pos_start, pos_end, context).error)
+        function = self
+        exec_ctx = self.acquire_frame(context, pos_start)
+
+        try:
+            while True:
+                function.populate_args(function.arg_name_toks, args, exec_ctx)
+
+                try:
+                    if function.should_auto_return:
+                        value = function_interpreter.visit_tail(function.body_node, exec_ctx)
+                    else:
+                        value = function_interpreter.visit(function.body_node, exec_ctx)
+                        if not function.should_auto_return: value = None
+                except ReturnException as ret:
+                    value = ret.value
+                if type(value) is not TailCall: return value or Number.null
+
+                # Run the tail call in place of the finished frame. Scoping is dynamic,
+                # so the callee starts from the bindings the dropped frame could show it
+                callee, args = value.function, value.args
+                if len(args) != len(callee.arg_name_toks):
+                    raise RTErrorException(callee.check_args(callee.arg_name_toks, args, value.pos_start, value.pos_end, context).error)
+                tail_ctx = callee.acquire_frame(context, value.pos_start)
+                for name, binding in exec_ctx.symbol_table.bindings():
+                    tail_ctx.symbol_table.set(name, binding)
+                function.release_frame(exec_ctx)
+                function, exec_ctx = callee, tail_ctx
+        finally:
+            function.release_frame(exec_ctx)
+
+    def execute(self, args, context, pos_start, pos_end):
+        res = RTResult()
+        try:
+            return res.success(self.invoke(args, context, pos_start, pos_end))
+        except RTErrorException as exception:
+            return res.failiure(exception.error)
+        except ContinueException:
+            return res.success_continue()
+        except BreakException:
+            return res.success_break()
+
+    def copy(self):
+        return Function(self.name, self.body_node, self.arg_name_toks, self.should_auto_return, self.local_names)
+    def __repr__(self):
+        return f"<function {self.name}>"
+
+class MemoCache:
+    def __init__(self, max_size=None):
+        self.max_size = max_size or MEMO_CACHE_SIZE
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.results.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        self.results[key] = value
+        if len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+
+class MemoFunction(BaseFunction):
+    # Wraps a function the user promises is pure, so calls with equal
+    # arguments reuse the first result instead of running the body again
+    __slots__ = ('function', 'cache')
+
+    def __init__(self, function, cache=None):
+        super().__init__(function.name)
+        self.function = function
+        self.cache = cache or MemoCache()
+
+    def key(self, args):
+        return tuple(arg.memo_key() for arg in args)
+
+    def execute(self, args, context, pos_start, pos_end):
         res = RTResult()
-        interpreter = Interpreter()
-        exec_ctx = self.generate_new_context()
+        key = self.key(args)
 
-        res.register(self.check_and_populate_args(self.arg_name_toks, args, exec_ctx))
+        cached = self.cache.get(key)
+        if cached is not None: return res.success(cached.copy())
+
+        value = res.register(self.function.execute(args, context, pos_start, pos_end))
         if res.should_return(): return res
 
-        value = res.register(interpreter.visit(self.body_node, exec_ctx))
-        if res.should_return() and res.func_return_value == None: return res
-        
-        ret_value = (value if self.should_auto_return else None) or res.func_return_value or Number.null
-        return res.success(ret_value)
+        # Lists can be changed in place by add(), so keep a copy of our own
+        self.cache.store(key, value.copy())
+        return res.success(value)
 
     def copy(self):
-        copy = Function(self.name, self.body_node, self.arg_name_toks, self.should_auto_return)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
+        return MemoFunction(self.function, self.cache)
     def __repr__(self):
-        return f"<function {self.name}>"
+        return f"<memo function {self.name}>"
     
 class BuiltInFunction(BaseFunction):
+    __slots__ = ('method',)
+
     def __init__(self, name):
         super().__init__(name)
+        self.method = getattr(BuiltInFunction, f'execute_{self.name}', None)
 
-    def execute(self, args):
-        res = RTResult()
-        exec_ctx = self.generate_new_context()
-
-        method_name = f'execute_{self.name}'
-        method = getattr(self, method_name, self.no_visit_method)
+    def execute(self, args, context, pos_start, pos_end):
+        method = self.method
+        if method is None: self.no_execute_method()
 
-        res.register(self.check_and_populate_args(method.arg_names, args, exec_ctx))
-        if res.should_return(): return res
+        if len(args) != len(method.arg_names):
+            return self.check_args(method.arg_names, args, pos_start, pos_end, context)
 
-        return_value = res.register(method(exec_ctx))
-        if res.should_return(): return res
-        return res.success(return_value)
+        # Arguments are passed straight to the method. Only a failing call gets
+        # a frame of its own, so its traceback still names the builtin
+        res = method(self, context, *args)
+        if res.error and res.error.pos_start is None:
+            res.error.set_pos(pos_start, pos_end).set_context(Context(self.name, context, pos_start))
+        return res
 
-    def no_visit_method(self, node, context):
+    def no_execute_method(self):
         raise Exception(f'NO EXECUTE METHOD DEFINED!!! {self.name}')
     
     def copy(self):
-        copy = BuiltInFunction(self.name)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
+        return BuiltInFunction(self.name)
     def __repr__(self):
         return f"<built in function {self.name}>"
     
     ##############################################
 
-    def execute_show(self, exec_ctx):
-        print(str(exec_ctx.symbol_table.get('value')))
+    def execute_show(self, context, value):
+        print(str(value))
         return RTResult().success(Number.null)
     execute_show.arg_names = ['value']
 
 
 
-    def execute_termp(self, exec_ctx):
-        print("Termination Point ", exec_ctx.symbol_table.get('value'), " reached!")
+    def execute_termp(self, context, value):
+        print("Termination Point ", value, " reached!")
         print("     EXITING PROGRAM ...  ")
         sys.exit()
         return RTResult().success(Number.null)
     execute_termp.arg_names = ['value']
 
-    def execute_showwar(self, exec_ctx):
+    def execute_showwar(self, context, value):
         print("⚠️   WARNING   ⚠️")
-        print(str(exec_ctx.symbol_table.get('value')))
+        print(str(value))
         print("⚠️   WARNING   ⚠️")
         return RTResult().success(Number.null)
     execute_showwar.arg_names = ['value']
 
-    def execute_sleep(self, exec_ctx):
+    def execute_sleep(self, context, value, unit):
         res = RTResult()
-        value = exec_ctx.symbol_table.get("value")
-        unit = exec_ctx.symbol_table.get("unit")
         if not isinstance(value, Number):
-            return res.failiure(RTError(self.pos_start, self.pos_end,"sleep() first argument must be a number",exec_ctx))
+            return res.failiure(RTError(None, None,"sleep() first argument must be a number",context))
         if not isinstance(unit, Number):
-            return res.failiure(RTError(self.pos_start, self.pos_end,"sleep() second argument must be a time unit(s,ms,m)",exec_ctx ))
+            return res.failiure(RTError(None, None,"sleep() second argument must be a time unit(s,ms,m)",context ))
         time.sleep(value.value * unit.value)
         return res.success(Number.null)
     execute_sleep.arg_names = ["value", "unit"]
 
-    def execute_date(self, exec_ctx):
+    def execute_date(self, context):
         return RTResult().success(String(datetime.date.today().isoformat()))
     execute_date.arg_names = []
 
-    def execute_date_time(self, exec_ctx):
+    def execute_date_time(self, context):
         return RTResult().success(String(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
     execute_date_time.arg_names = []
 
-    def execute_weekday(self, exec_ctx):
+    def execute_weekday(self, context):
         return RTResult().success(Number(datetime.datetime.now().weekday()))
     execute_weekday.arg_names = []
 
-    def execute_weekday_str(self, exec_ctx):
+    def execute_weekday_str(self, context):
         return RTResult().success(String(datetime.datetime.now().strftime("%A")))
     execute_weekday_str.arg_names = []
     
-    def execute_showerr(self, exec_ctx):
+    def execute_showerr(self, context, value):
         print("❌   ERROR   ❌")
-        print(str(exec_ctx.symbol_table.get('value')))
+        print(str(value))
         print("❌   ERROR   ❌")
         return RTResult().success(Number.null)
     execute_showerr.arg_names = ['value']
 
-    def execute_loadenv(self, exec_ctx):
+    def execute_loadenv(self, context):
         load_dotenv()
         return RTResult().success(Number(1))
     execute_loadenv.arg_names = []
 
-    def execute_findenv(self, exec_ctx):
-        key = exec_ctx.symbol_table.get("key")
+    def execute_findenv(self, context, key):
         value = os.getenv(key.value)
         if value is None:
             return RTResult().success()
         return RTResult().success(String(value))
     execute_findenv.arg_names = ["key"]
 
-    def execute_showret(self, exec_ctx):
-        return RTResult().success(String(exec_ctx.symbol_table.get('value')))
+    def execute_showret(self, context, value):
+        return RTResult().success(String(value))
     execute_showret.arg_names = ['value']
 
-    def execute_usrinput(self, exec_ctx):
+    def execute_usrinput(self, context):
         text = input()
         return RTResult().success(String(text))
     execute_usrinput.arg_names = []
 
-    def execute_intinput(self, exec_ctx):
+    def execute_intinput(self, context):
         while True:
             text = input()
             try:
@@ -1730,149 +2508,160 @@ class BuiltInFunction(BaseFunction):
         return RTResult().success(Number(number))
     execute_intinput.arg_names = []
 
-    def execute_clean(self, exec_ctx):
+    def execute_clean(self, context):
         os.system('cls' if os.name == 'nt' else 'clear')
         return RTResult().success(Number.null)
     execute_clean.arg_names = []
 
-    def execute_isnum(self, exec_ctx):
-        is_number = isinstance(exec_ctx.symbol_table.get('value'), Number)
+    def execute_isnum(self, context, value):
+        is_number = isinstance(value, Number)
         return RTResult().success(Number.true if is_number else Number.false)
     execute_isnum.arg_names = ['value']
 
-    def execute_isstr(self, exec_ctx):
-        is_number = isinstance(exec_ctx.symbol_table.get('value'), String)
+    def execute_isstr(self, context, value):
+        is_number = isinstance(value, String)
         return RTResult().success(Number.true if is_number else Number.false)
     execute_isstr.arg_names = ['value']
 
-    def execute_islist(self, exec_ctx):
-        is_number = isinstance(exec_ctx.symbol_table.get('value'), List)
+    def execute_islist(self, context, value):
+        is_number = isinstance(value, List)
         return RTResult().success(Number.true if is_number else Number.false)
     execute_islist.arg_names = ['value']
 
-    def execute_is_funct(self, exec_ctx):
-        is_number = isinstance(exec_ctx.symbol_table.get('value'), BaseFunction)
-        return RTResult().success(Number.true if is_number else Number.false)
-    execute_is_funct.arg_names = ['value']
+    def execute_isfunct(self, context, value):
+        is_function = isinstance(value, BaseFunction)
+        return RTResult().success(Number.true if is_function else Number.false)
+    execute_isfunct.arg_names = ['value']
 
-    def execute_add(self, exec_ctx):
-        list_ = exec_ctx.symbol_table.get('list')
-        value = exec_ctx.symbol_table.get('value')
+    def execute_memo(self, context, function):
+        if not isinstance(function, BaseFunction):
+            return RTResult().failiure(RTError(
+                None, None,
+                'Argument must be a function!',
+                context
+            ))
+        if isinstance(function, MemoFunction):
+            return RTResult().success(function)
+        return RTResult().success(MemoFunction(function))
+    execute_memo.arg_names = ['function']
+
+    def execute_memostats(self, context, function):
+        if not isinstance(function, MemoFunction):
+            return RTResult().failiure(RTError(
+                None, None,
+                'Argument must be a function returned by memo()!',
+                context
+            ))
+        cache = function.cache
+        return RTResult().success(List([Number(cache.hits), Number(cache.misses), Number(len(cache.results))]))
+    execute_memostats.arg_names = ['function']
 
+    def execute_add(self, context, list_, value):
         if not isinstance(list_, List):
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 'First argument must be a list',
-                exec_ctx
+                context
             ))
-        list_.elements.append(value)
+        list_.vector = list_.vector.append(value)
         return RTResult().success(Number.null)
     execute_add.arg_names = ['list', 'value']
 
-    def execute_remove(self, exec_ctx):
-        list_ = exec_ctx.symbol_table.get('list')
-        index = exec_ctx.symbol_table.get('index')
-
+    def execute_remove(self, context, list_, index):
         if not isinstance(list_, List):
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 'First argument must be a list',
-                exec_ctx
+                context
             ))
 
         if not isinstance(index, Number):
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 'Second argument must be a number',
-                exec_ctx
+                context
             ))
 
         try:
-            element = list_.elements.pop(index.value)
+            element = list_.vector.get(index.value)
+            list_.vector = list_.vector.remove(index.value)
         except:
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 'Element at this index could not be removed from list because index is out of bounds!',
-                exec_ctx
+                context
             ))
         return RTResult().success(element)
     execute_remove.arg_names = ['list', 'index']
 
-    def execute_extend(self, exec_ctx):
-        listA = exec_ctx.symbol_table.get('listA')
-        listB = exec_ctx.symbol_table.get('listB')
-
+    def execute_extend(self, context, listA, listB):
         if not isinstance(listA, List):
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 'First argument must be a list',
-                exec_ctx
+                context
             ))
 
         if not isinstance(listB, List):
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 'Second argument must be a second list',
-                exec_ctx
+                context
             ))
 
-        listA.elements.extend(listB.elements)
+        listA.vector = listA.vector.concat(listB.vector)
         return RTResult().success(Number.null)
     execute_extend.arg_names = ['listA', 'listB']
 
-    def execute_filefound(self, exec_ctx):
-        path = exec_ctx.symbol_table.get("path").value
+    def execute_filefound(self, context, path):
+        path = path.value
         return RTResult().success(Number(int(os.path.exists(path))))
     execute_filefound.arg_names = ["path"]
 
-    def execute_readfile(self, exec_ctx):
-        path = exec_ctx.symbol_table.get("path").value
+    def execute_readfile(self, context, path):
+        path = path.value
         try:
             with open(path, "r", encoding="utf-8") as f:
                 return RTResult().success(String(f.read()))
         except Exception as e:
-            return RTResult().failure(RTError(self.pos_start, self.pos_end,str("Could not read file. Check if file exists.", e),exec_ctx))
+            return RTResult().failure(RTError(None, None,str("Could not read file. Check if file exists.", e),context))
     execute_readfile.arg_names = ["path"]
 
-    def execute_writefile(self, exec_ctx):
-        path = exec_ctx.symbol_table.get("path").value
-        text = exec_ctx.symbol_table.get("text").value
+    def execute_writefile(self, context, path, text):
+        path = path.value
+        text = text.value
         with open(path, "w", encoding="utf-8") as f:
             f.write(text)
         return RTResult().success(Number(1))
 
     execute_writefile.arg_names = ["path", "text"]
 
-    def execute_appendfile(self, exec_ctx):
-        path = exec_ctx.symbol_table.get("path").value
-        text = exec_ctx.symbol_table.get("text").value
+    def execute_appendfile(self, context, path, text):
+        path = path.value
+        text = text.value
         with open(path, "a", encoding="utf-8") as f:
             f.write(text)
         return RTResult().success(Number(1))
     execute_appendfile.arg_names = ["path", "text"]
 
 
-    def execute_len(self, exec_ctx):
-        list_ = exec_ctx.symbol_table.get("list")
-
+    def execute_len(self, context, list_):
         if not isinstance(list_, List):
-            return RTResult.failiure(RTError(
-                self.pos_start, self.pos_end,
+            return RTResult().failiure(RTError(
+                None, None,
                 "Argument must be a list!",
-                exec_ctx
+                context
             ))
         
-        return RTResult().success(Number(len(list_.elements)))
+        return RTResult().success(Number(len(list_.vector)))
     execute_len.arg_names = ["list"]
 
-    def execute_run(self, exec_ctx):
-        fn = exec_ctx.symbol_table.get("fn")
-
+    def execute_run(self, context, fn):
         if not isinstance(fn, String):
-            return RTResult.failiure(RTError(
-                self.pos_start, self.pos_end,
+            return RTResult().failiure(RTError(
+                None, None,
                 "Argument must be a string!",
-                exec_ctx
+                context
             ))
         fn = fn.value
 
@@ -1881,25 +2670,49 @@ class BuiltInFunction(BaseFunction):
                 script = f.read()
         except Exception as e:
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 f"Failed to read swiftcode file {fn}\n" + str(e),
-                exec_ctx
+                context
             ))
         
-        _, error = run(fn, script)
+        _, error = run(fn, script, context.engine, context.cache, context.optimize)
 
         if error:
             return RTResult().failiure(RTError(
-                self.pos_start, self.pos_end,
+                None, None,
                 f"Failed to finish executing file {fn}\n" + 
                 error.as_string(),
-                exec_ctx
+                context
             ))
         
         return RTResult().success(Number.null)
     execute_run.arg_names = ["fn"]
 
-BuiltInFunction.print = BuiltInFunction('show')
+    def execute_import(self, context, fn):
+        if not isinstance(fn, String):
+            return RTResult().failiure(RTError(
+                None, None,
+                "Argument must be a string!",
+                context
+            ))
+
+        module, error = module_registry.load(fn.value, context.engine, context.optimize, context.cache)
+        if error:
+            return RTResult().failiure(RTError(
+                None, None,
+                error,
+                context
+            ))
+
+        # Bind the module's top level names in the scope that imported it
+        caller_table = context.symbol_table
+        for name, value in module.exports():
+            caller_table.set(name, value)
+
+        return RTResult().success(Number.null)
+    execute_import.arg_names = ["fn"]
+
+BuiltInFunction.print = BuiltInFunction('show')
 BuiltInFunction.printco = BuiltInFunction('showco')
 BuiltInFunction.printwar = BuiltInFunction('showwar')
 BuiltInFunction.printerr = BuiltInFunction('showerr')
@@ -1911,11 +2724,14 @@ BuiltInFunction.is_number = BuiltInFunction('isnum')
 BuiltInFunction.is_string = BuiltInFunction('isstr')
 BuiltInFunction.is_list = BuiltInFunction('islist')
 BuiltInFunction.is_function = BuiltInFunction('isfunct')
+BuiltInFunction.memo = BuiltInFunction('memo')
+BuiltInFunction.memostats = BuiltInFunction('memostats')
 BuiltInFunction.append = BuiltInFunction('add')
 BuiltInFunction.pop = BuiltInFunction('remove')
 BuiltInFunction.extend = BuiltInFunction('extend')
 BuiltInFunction.len = BuiltInFunction('len')
 BuiltInFunction.run = BuiltInFunction('run')
+BuiltInFunction.import_ = BuiltInFunction('import')
 BuiltInFunction.termp = BuiltInFunction('termp')
 BuiltInFunction.loadenv = BuiltInFunction('loadenv')
 BuiltInFunction.findenv = BuiltInFunction('findenv')
@@ -1928,282 +2744,1881 @@ BuiltInFunction.writefile = BuiltInFunction('writefile')
 ##############################################
 
 class Context:
-    def __init__(self, display_name, parent=None, parent_entry_pos=None):
+    __slots__ = ('display_name', 'parent', 'parent_entry_pos', 'symbol_table', 'engine', 'optimize', 'cache')
+
+    def __init__(self, display_name, parent=None, parent_entry_pos=None, engine=None, optimize=None, cache=None):
         self.display_name = display_name
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
         self.symbol_table = None
+        # Files run or imported while running use the same engine, optimization level and AST cache setting
+        self.engine = engine or (parent.engine if parent else 'tree')
+        self.optimize = optimize if optimize is not None else (parent.optimize if parent else 0)
+        self.cache = cache if cache is not None else (parent.cache if parent else True)
+
+    def inlined(self, name, pos_start):
+        # The frame an inlined call runs in: named like the call for tracebacks,
+        # but reading and writing the caller's own symbol table
+        context = Context(name, self, pos_start)
+        context.symbol_table = self.symbol_table
+        return context
 
 ##############################################
 #               SYMBOL TABLE
 ##############################################
 
+class ScopedNames:
+    # Every name ever bound outside the global table, with a version that changes
+    # whenever one is added. Any other name is global or undefined wherever it is used
+    def __init__(self):
+        self.names = set()
+        self.version = 0
+
+    def add(self, name):
+        self.names.add(name)
+        self.version += 1
+
+    def add_all(self, names):
+        if not self.names.issuperset(names):
+            self.names.update(names)
+            self.version += 1
+
+scoped_names = ScopedNames()
+
+class GlobalCache:
+    # A lookup site in engines that have no node to keep its cache on
+    __slots__ = ('global_version',)
+
+    def __init__(self):
+        self.global_version = -1
+
+def lookup_name(site, name, symbol_table):
+    # A site whose name was global-only at the current version reads the global
+    # table directly instead of walking every scope between it and the globals
+    if site.global_version != scoped_names.version:
+        if name in scoped_names.names: return symbol_table.get(name)
+        site.global_version = scoped_names.version
+    return global_symbol_table.symbols.get(name)
+
 class SymbolTable:
+    __slots__ = ('symbols', 'parent')
+
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
 
     def get(self, name):
-        value = self.symbols.get(name, None)
-        if value == None and self.parent:
-            return self.parent.get(name)
-        return value
+        # Scopes chain through every active call, so walk them in a loop
+        # rather than recursing once per call level
+        table = self
+        while table:
+            value = table.get_local(name)
+            if value is not None: return value
+            table = table.parent
+        return None
+
+    def get_local(self, name):
+        return self.symbols.get(name)
     
     def set(self, name, value):
+        if name not in scoped_names.names: scoped_names.add(name)
         self.symbols[name] = value
 
     def remove(self, name):
         del self.symbols[name]
 
+    def bindings(self):
+        return list(self.symbols.items())
+
+class GlobalSymbolTable(SymbolTable):
+    __slots__ = ()
+
+    def set(self, name, value):
+        self.symbols[name] = value
+
+class Frame(SymbolTable):
+    __slots__ = ('local_names', 'slots')
+
+    def __init__(self, local_names, parent=None):
+        super().__init__(parent)
+        self.local_names = local_names
+        self.slots = [None] * len(local_names)
+        scoped_names.add_all(local_names)
+
+    def clear(self):
+        self.slots = [None] * len(self.local_names)
+        if self.symbols: self.symbols = {}
+
+    def get_local(self, name):
+        slot = self.local_names.get(name)
+        return self.slots[slot] if slot is not None else self.symbols.get(name)
+
+    def get_slot(self, slot, name):
+        value = self.slots[slot]
+        if value is None and self.parent:
+            return self.parent.get(name)
+        return value
+
+    def set(self, name, value):
+        slot = self.local_names.get(name)
+        if slot is None:
+            if name not in scoped_names.names: scoped_names.add(name)
+            self.symbols[name] = value
+        else:
+            self.slots[slot] = value
+
+    def remove(self, name):
+        slot = self.local_names.get(name)
+        if slot is None:
+            del self.symbols[name]
+        else:
+            self.slots[slot] = None
+
+    def bindings(self):
+        bindings = [(name, self.slots[slot]) for name, slot in self.local_names.items() if self.slots[slot] is not None]
+        return bindings + list(self.symbols.items())
+
 ##############################################
 #               INTERPRETER
 ##############################################
 
+class ReturnException(Exception):
+    def __init__(self, value):
+        self.value = value
+
+class ContinueException(Exception):
+    pass
+
+class BreakException(Exception):
+    pass
+
+class RTErrorException(Exception):
+    def __init__(self, error):
+        self.error = error
+
+def raise_relocated(error, pos_start, pos_end, context):
+    raise RTErrorException(error.set_pos(pos_start, pos_end).set_context(context))
+
+class TailCall:
+    __slots__ = ('function', 'args', 'pos_start', 'pos_end')
+
+    def __init__(self, function, args, pos_start, pos_end):
+        self.function = function
+        self.args = args
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
+# Arithmetic and comparisons on two plain Numbers, done straight on their values
+NUMBER_ARITHMETIC = {
+    ST_PLUS: operator.add,
+    ST_MINUS: operator.sub,
+    ST_MUL: operator.mul,
+    ST_DIV: operator.truediv,
+    ST_POW: operator.pow,
+}
+NUMBER_COMPARISONS = {
+    ST_EE: operator.eq,
+    ST_NE: operator.ne,
+    ST_LT: operator.lt,
+    ST_GT: operator.gt,
+    ST_LTE: operator.le,
+    ST_GTE: operator.ge,
+}
+
+# The interpreter switches a BinOpNode to one of these once it keeps seeing two
+# Numbers, and back to BinOpNode as soon as anything else shows up
+class NumberArithNode(BinOpNode):
+    __slots__ = ()
+
+class NumberCompareNode(BinOpNode):
+    __slots__ = ()
+
+def iterate_range(start, end, step):
+    # Whole number bounds count on a native range; anything else steps the way iterate always has
+    if type(start) is int and type(end) is int and type(step) is int and step != 0:
+        return range(start, end, step)
+    return float_range(start, end, step)
+
+def float_range(i, end, step):
+    while (i < end) if step >= 0 else (i > end):
+        yield i
+        i += step
+
 class Interpreter:
+    # Node type -> visit method, looked up the first time each type is visited
+    dispatch = {}
+
+    def __init__(self, tail_calls=False):
+        # Only function bodies may hand a tail call back to Function.invoke
+        self.tail_calls = tail_calls
+
     def visit(self, node, context):
-        method_name = f'visit_{type(node).__name__}'
-        method = getattr(self, method_name, self.no_visit_method)
-        return method(node, context)
+        try:
+            method = self.dispatch[type(node)]
+        except KeyError:
+            method_name = f'visit_{type(node).__name__}'
+            method = self.dispatch[type(node)] = getattr(Interpreter, method_name, Interpreter.no_visit_method)
+        return method(self, node, context)
 
     def no_visit_method(self, node, context):
         raise Exception(f'NO VISIT METHOD DEFINED!!! {type(node).__name__}')
 
+    def run(self, node, context):
+        res = RTResult()
+        try:
+            return res.success(self.visit(node, context))
+        except RTErrorException as exception:
+            return res.failiure(exception.error)
+        except ReturnException:
+            return res.success_return(None)
+        except ContinueException:
+            return res.success_continue()
+        except BreakException:
+            return res.success_break()
+
+    def unwrap(self, res):
+        # Values outside the tree engine still answer calls with an RTResult
+        if res.error: raise RTErrorException(res.error)
+        if res.loop_should_continue: raise ContinueException()
+        if res.loop_should_break: raise BreakException()
+        return res.value
+
     def visit_NumberNode(self, node, context):
-        return RTResult().success(
-            Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return node.value
     
     def visit_StringNode(self, node, context):
-        return RTResult().success(
-        String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end))
+        return node.value
 
     def visit_ListNode(self, node, context):
-        res = RTResult()
-        elements = []
+        if node.should_return_null:
+            for element_node in node.element_nodes:
+                self.visit(element_node, context)
+            return Number.null
 
-        for element_node in node.element_nodes:
-            elements.append(res.register(self.visit(element_node, context)))
-            if res.should_return(): return res
-
-        return res.success(
-            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return List([self.visit(element_node, context) for element_node in node.element_nodes])
     
     def visit_VarAccessNode(self, node, context):
-        res = RTResult()
         var_name = node.var_name_tok.value
-        value = context.symbol_table.get(var_name)
+        if node.slot is None:
+            value = lookup_name(node, var_name, context.symbol_table)
+        else:
+            value = context.symbol_table.get_slot(node.slot, var_name)
 
         if not value:
-            return res.failiure(RTError(
+            raise RTErrorException(RTError(
                 node.pos_start, node.pos_end,
                 f"Variable '{var_name}' is not defined!!",
                 context
             ))
         
-        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-        return res.success(value)
+        return value
     
     def visit_VarAssignNode(self, node, context):
-        res = RTResult()
         var_name = node.var_name_tok.value
-        value = res.register(self.visit(node.value_node, context))
-        if res.should_return(): return res
+        value = self.visit(node.value_node, context)
 
-        context.symbol_table.set(var_name, value)
-        return res.success(value)
+        if node.slot is None:
+            context.symbol_table.set(var_name, value)
+        else:
+            context.symbol_table.slots[node.slot] = value
+        return value
 
     def visit_BinOpNode(self, node, context):
-        res = RTResult()
-        left = res.register(self.visit(node.left_node, context))
-        if res.should_return(): return res
-        right = res.register(self.visit(node.right_node, context))
-        if res.should_return(): return res
+        left = self.visit(node.left_node, context)
+        right = self.visit(node.right_node, context)
 
-        if node.op_tok.type == ST_PLUS:
-            result, error = left.added_to(right)
-        elif node.op_tok.type == ST_MINUS:
-            result, error = left.subbed_by(right)
-        elif node.op_tok.type == ST_MUL:
-            result, error = left.multed_by(right)
-        elif node.op_tok.type == ST_DIV:
-            result, error = left.dived_by(right)
-        elif node.op_tok.type == ST_POW:
-            result, error = left.powed_by(right)
-        elif node.op_tok.type == ST_EE:
-            result, error = left.get_comparison_eq(right)
-        elif node.op_tok.type == ST_NE:
-            result, error = left.get_comparison_ne(right)
-        elif node.op_tok.type == ST_LT:
-            result, error = left.get_comparison_lt(right)
-        elif node.op_tok.type == ST_GT:
-            result, error = left.get_comparison_gt(right)
-        elif node.op_tok.type == ST_LTE:
-            result, error = left.get_comparison_lte(right)
-        elif node.op_tok.type == ST_GTE:
-            result, error = left.get_comparison_gte(right)
-        elif node.op_tok.matches(ST_KEYWORD, 'and'):
-            result, error = left.anded_by(right)
-        elif node.op_tok.matches(ST_KEYWORD, 'or'):
-            result, error = left.ored_by(right)
-        elif node.op_tok.type == ST_SEQ:
-            if isinstance(left, String):
-                result, error = left.get_string_eq(right)
-            else:
-                return res.failiure(RTError(node.pos_start, node.pos_end,"=` can only be used for string comparison",context))
+        if type(left) is Number and type(right) is Number:
+            node.number_hits += 1
+            if node.number_hits >= QUICKEN_THRESHOLD: self.quicken(node)
+        else:
+            node.number_hits = 0
+        return self.binary_op(node, left, right, context)
 
-        if error:
-            return res.failiure(error)
+    def visit_NumberArithNode(self, node, context):
+        left = self.operand(node.left_node, context)
+        right = self.operand(node.right_node, context)
+
+        if type(left) is Number and type(right) is Number:
+            # Dividing by zero takes the generic path for its error, but stays quickened
+            if right.value != 0 or node.op_tok.type != ST_DIV:
+                return Number(NUMBER_ARITHMETIC[node.op_tok.type](left.value, right.value))
         else:
-            return res.success(result.set_pos(node.pos_start, node.pos_end))
+            self.deoptimize(node)
+        return self.binary_op(node, left, right, context)
+
+    def visit_NumberCompareNode(self, node, context):
+        left = self.operand(node.left_node, context)
+        right = self.operand(node.right_node, context)
+
+        if type(left) is Number and type(right) is Number:
+            return Number.true if NUMBER_COMPARISONS[node.op_tok.type](left.value, right.value) else Number.false
+        self.deoptimize(node)
+        return self.binary_op(node, left, right, context)
+
+    def operand(self, node, context):
+        # Quickened nodes read literals and defined variables directly; anything else is visited
+        if type(node) is NumberNode: return node.value
+        if type(node) is VarAccessNode:
+            if node.slot is None:
+                value = lookup_name(node, node.var_name_tok.value, context.symbol_table)
+            else:
+                value = context.symbol_table.get_slot(node.slot, node.var_name_tok.value)
+            if value is not None: return value
+
+        return self.visit(node, context)
+
+    def quicken(self, node):
+        op = node.op_tok.type
+        if op in NUMBER_ARITHMETIC:
+            node.__class__ = NumberArithNode
+        elif op in NUMBER_COMPARISONS:
+            node.__class__ = NumberCompareNode
+
+    def deoptimize(self, node):
+        node.__class__ = BinOpNode
+        node.number_hits = 0
+
+    def binary_op(self, node, left, right, context):
+        if node.op_tok.type == ST_SEQ:
+            if not isinstance(left, String):
+                raise RTErrorException(RTError(node.pos_start, node.pos_end,"=` can only be used for string comparison",context))
+            result, error = left.get_string_eq(right)
+        else:
+            result, error = getattr(left, BINARY_OPS[node.op_tok.type])(right)
+
+        if error: raise_relocated(error, node.pos_start, node.pos_end, context)
+        return result
     
     def visit_UnaryOpNode(self, node, context):
-        res = RTResult()
-        number = res.register(self.visit(node.node, context))
-        if res.should_return(): return res
+        number = self.visit(node.node, context)
 
         error = None
 
         if node.op_tok.type == ST_MINUS:
             number, error = number.multed_by(Number(-1))
-        elif node.op_tok.matches(ST_KEYWORD, 'not'):
+        elif node.op_tok.type == KW_NOT:
             number, error = number.notted()
 
-        if res.error:
-            return res.failiure(error)
-        else:
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+        if error: raise_relocated(error, node.pos_start, node.pos_end, context)
+        return number
         
     def visit_IfNode(self, node, context):
-        res = RTResult()
-
         for condition, expr, should_return_null in node.cases:
-            condition_value = res.register(self.visit(condition, context))
-            if res.should_return(): return res
-
-            if condition_value.is_true():
-                expr_value = res.register(self.visit(expr, context))
-                if res.should_return(): return res
-                return res.success(Number.null if should_return_null else expr_value)
+            if self.visit(condition, context).is_true():
+                expr_value = self.visit(expr, context)
+                return Number.null if should_return_null else expr_value
         if node.else_case:
             expr, should_return_null = node.else_case
             
-            expr_value = res.register(self.visit(expr, context))
-            if res.should_return(): return res
-            return res.success(Number.null if should_return_null else expr_value)
+            expr_value = self.visit(expr, context)
+            return Number.null if should_return_null else expr_value
         
-        return res.success(Number.null)
+        return Number.null
     def visit_IterateNode(self, node, context):
-        res = RTResult()
         elements = []
 
-        start_value = res.register(self.visit(node.start_value_node, context))
-        if res.should_return(): return res
-        end_value = res.register(self.visit(node.end_value_node, context))
-        if res.should_return(): return res
+        start_value = self.visit(node.start_value_node, context)
+        end_value = self.visit(node.end_value_node, context)
 
         if node.step_value_node:
-            step_value = res.register(self.visit(node.step_value_node, context))
-            if res.should_return(): return res
-        else:
-            step_value = Number(1)
-
-        i = start_value.value
-
-        if step_value.value >= 0:
-            condition = lambda: i < end_value.value
+            step_value = self.visit(node.step_value_node, context)
         else:
-            condition = lambda: i > end_value.value
+            step_value = Number.of(1)
 
-        while condition():
-            context.symbol_table.set(node.var_name_tok.value, Number(i))
-            i += step_value.value
-            value = (res.register(self.visit(node.body_node, context)))
-            if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
+        symbol_table = context.symbol_table
+        var_name, var_slot = node.var_name_tok.value, node.var_slot
+        body_node = node.body_node
 
-            if res.loop_should_continue:
+        for i in iterate_range(start_value.value, end_value.value, step_value.value):
+            if var_slot is None:
+                symbol_table.set(var_name, Number.of(i))
+            else:
+                symbol_table.slots[var_slot] = Number.of(i)
+            try:
+                value = self.visit(body_node, context)
+            except ContinueException:
                 continue
-
-            if res.loop_should_break:
+            except BreakException:
                 break
 
-            elements.append(value)
+            if not node.should_return_null: elements.append(value)
 
-        return res.success(
-            Number.null if node.should_return_null else
-            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return Number.null if node.should_return_null else List(elements)
     def visit_WhileNode(self, node, context):
-        res = RTResult()
         elements = []
 
-        while True:
-            condition = res.register(self.visit(node.condition_node, context))
-            if res.should_return(): return res
-
-            if not condition.is_true(): break
-
-            value = (res.register(self.visit(node.body_node, context)))
-            if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
-
-            if res.loop_should_continue:
+        while self.visit(node.condition_node, context).is_true():
+            try:
+                value = self.visit(node.body_node, context)
+            except ContinueException:
                 continue
-            if res.loop_should_break:
+            except BreakException:
                 break
-            elements.append(value)
-        return res.success(
-            Number.null if node.should_return_null else
-            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)  
-        )
+
+            if not node.should_return_null: elements.append(value)
+        return Number.null if node.should_return_null else List(elements)
 
     def visit_FuncDefNode(self, node, context):
-        res = RTResult()
         func_name = node.var_name_tok.value if node.var_name_tok else None
         body_node = node.body_node
         arg_names = [arg_name.value for arg_name in node.arg_name_toks]
-        func_value = Function(func_name, body_node, arg_names, node.should_auto_return).set_context(context).set_pos(node.pos_start, node.pos_end)
+        func_value = Function(func_name, body_node, arg_names, node.should_auto_return, node.local_names)
 
-        if node.var_name_tok:
+        if node.name_slot is not None:
+            context.symbol_table.slots[node.name_slot] = func_value
+        elif node.var_name_tok:
             context.symbol_table.set(func_name, func_value)
-        return res.success(func_value)
+        return func_value
     def visit_CallNode(self, node, context):
-        res = RTResult()
-        args = []
+        value_to_call = self.visit(node.node_to_call, context)
+        args = [self.visit(arg_node, context) for arg_node in node.arg_nodes]
 
-        value_to_call = res.register(self.visit(node.node_to_call, context))
-        if res.should_return(): return res
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+        if type(value_to_call) is Function:
+            return value_to_call.invoke(args, context, node.pos_start, node.pos_end)
+        return self.unwrap(value_to_call.execute(args, context, node.pos_start, node.pos_end))
 
-        for arg_node in node.arg_nodes:
-            args.append(res.register(self.visit(arg_node, context)))
-            if res.should_return(): return res
-        return_value = res.register(value_to_call.execute(args))
-        if res.should_return(): return res
-        return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-        return res.success(return_value)
+    def visit_tail_call(self, node, context):
+        value_to_call = self.visit(node.node_to_call, context)
+        args = [self.visit(arg_node, context) for arg_node in node.arg_nodes]
+
+        if type(value_to_call) is not Function:
+            return self.unwrap(value_to_call.execute(args, context, node.pos_start, node.pos_end))
+        return TailCall(value_to_call, args, node.pos_start, node.pos_end)
     
+    def visit_tail(self, node, context):
+        # The value of this expression is what the function returns, so a call
+        # here comes back as a TailCall for Function.invoke to run in its place
+        if type(node) is CallNode: return self.visit_tail_call(node, context)
+        if type(node) is not IfNode: return self.visit(node, context)
+
+        for condition, expr, should_return_null in node.cases:
+            if self.visit(condition, context).is_true():
+                return self.visit_branch(expr, should_return_null, context)
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            return self.visit_branch(expr, should_return_null, context)
+        return Number.null
+
+    def visit_branch(self, expr, should_return_null, context):
+        if not should_return_null: return self.visit_tail(expr, context)
+        self.visit(expr, context)
+        return Number.null
+
     def visit_ReturnNode(self, node, context):
-        res = RTResult()
+        if self.tail_calls and node.node_to_return:
+            raise ReturnException(self.visit_tail(node.node_to_return, context))
 
         if node.node_to_return:
-            value = res.register(self.visit(node.node_to_return, context))
-            if res.should_return(): return res
+            value = self.visit(node.node_to_return, context)
         else:
             value= Number.null
 
-        return res.success_return(value)
+        raise ReturnException(value)
     
+    def visit_InlineNode(self, node, context):
+        return self.visit(node.body_node, context.inlined(node.name, node.pos_start))
+
     def visit_ContinueNode(self, node, context):
-        return RTResult().success_continue()
+        raise ContinueException()
     
     def visit_BreakNode(self, node, context):
-        return RTResult().success_break()
+        raise BreakException()
+
+# Runs every function body. It keeps no state between calls, so one is enough
+function_interpreter = Interpreter(tail_calls=True)
+
+##############################################
+#               BYTECODE
+##############################################
+
+OP_LOAD_CONST = 0
+OP_LOAD_NAME = 1
+OP_STORE_NAME = 2
+OP_POP_TOP = 3
+OP_BINARY_OP = 4
+OP_STRING_EQ = 5
+OP_UNARY_NEG = 6
+OP_UNARY_NOT = 7
+OP_BUILD_LIST = 8
+OP_LIST_APPEND = 9
+OP_JUMP = 10
+OP_POP_JUMP_IF_FALSE = 11
+OP_MAKE_FUNCTION = 12
+OP_CALL = 13
+OP_RETURN_VALUE = 14
+OP_SETUP_LOOP = 15
+OP_POP_BLOCK = 16
+OP_BREAK_LOOP = 17
+OP_CONTINUE_LOOP = 18
+OP_FOR_RANGE_SETUP = 19
+OP_FOR_RANGE_NEXT = 20
+OP_END = 21
+OP_ENTER_INLINE = 22
+OP_EXIT_INLINE = 23
+OP_TAIL_CALL = 24
+
+BINARY_OPS = {
+    ST_PLUS: 'added_to',
+    ST_MINUS: 'subbed_by',
+    ST_MUL: 'multed_by',
+    ST_DIV: 'dived_by',
+    ST_POW: 'powed_by',
+    ST_EE: 'get_comparison_eq',
+    ST_NE: 'get_comparison_ne',
+    ST_LT: 'get_comparison_lt',
+    ST_GT: 'get_comparison_gt',
+    ST_LTE: 'get_comparison_lte',
+    ST_GTE: 'get_comparison_gte',
+    KW_AND: 'anded_by',
+    KW_OR: 'ored_by',
+}
+BINARY_OP_NAMES = list(BINARY_OPS.values())
+
+class CodeObject:
+    def __init__(self, name, arg_names=None, should_auto_return=False):
+        self.name = name
+        self.arg_names = arg_names or []
+        self.should_auto_return = should_auto_return
+        self.code = []
+        self.consts = []
+        self.const_indexes = {}
+        self.names = []
+        self.name_sites = []
+        self.positions = {}
+        self.loops = []
+
+    def add_const(self, value):
+        # Interned literals come back as the same object, so one slot serves them all
+        if id(value) not in self.const_indexes:
+            self.const_indexes[id(value)] = len(self.consts)
+            self.consts.append(value)
+        return self.const_indexes[id(value)]
+
+    def add_name(self, name):
+        if name not in self.names:
+            self.names.append(name)
+            self.name_sites.append(GlobalCache())
+        return self.names.index(name)
+
+    def __repr__(self):
+        return f'<code {self.name}>'
+
+##############################################
+#               COMPILER
+##############################################
+
+class Compiler:
+    def compile(self, node, name='<code>', arg_names=None, should_auto_return=False):
+        self.code = CodeObject(name, arg_names, should_auto_return)
+        if should_auto_return:
+            self.compile_tail(node)
+        else:
+            self.visit(node)
+        self.emit(OP_END)
+        return self.code
+
+    def visit(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'NO COMPILE METHOD DEFINED!!! {type(node).__name__}')
+
+    def emit(self, op, arg=0, node=None):
+        if node:
+            self.code.positions[len(self.code.code)] = (node.pos_start, node.pos_end)
+        self.code.code.extend((op, arg))
+        return len(self.code.code) - 1
+
+    def label(self):
+        return len(self.code.code)
+
+    def patch(self, arg_idx, target):
+        self.code.code[arg_idx] = target
+
+    ##############################################
+
+    def compile_NumberNode(self, node):
+        self.emit(OP_LOAD_CONST, self.code.add_const(node.value))
+
+    def compile_StringNode(self, node):
+        self.emit(OP_LOAD_CONST, self.code.add_const(node.value))
+
+    def compile_ListNode(self, node):
+        if node.should_return_null:
+            for element_node in node.element_nodes:
+                self.visit(element_node)
+                self.emit(OP_POP_TOP)
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.null))
+            return
+
+        for element_node in node.element_nodes:
+            self.visit(element_node)
+        self.emit(OP_BUILD_LIST, len(node.element_nodes), node)
+
+    def compile_VarAccessNode(self, node):
+        self.emit(OP_LOAD_NAME, self.code.add_name(node.var_name_tok.value), node)
+
+    def compile_VarAssignNode(self, node):
+        self.visit(node.value_node)
+        self.emit(OP_STORE_NAME, self.code.add_name(node.var_name_tok.value))
+
+    def compile_BinOpNode(self, node):
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+        if node.op_tok.type == ST_SEQ:
+            self.emit(OP_STRING_EQ, 0, node)
+            return
+
+        op_name = BINARY_OPS[node.op_tok.type]
+        self.emit(OP_BINARY_OP, BINARY_OP_NAMES.index(op_name), node)
+
+    def compile_UnaryOpNode(self, node):
+        self.visit(node.node)
+
+        if node.op_tok.type == ST_MINUS:
+            self.emit(OP_UNARY_NEG, 0, node)
+        elif node.op_tok.type == KW_NOT:
+            self.emit(OP_UNARY_NOT, 0, node)
+
+    def compile_IfNode(self, node, tail=False):
+        end_jumps = []
+
+        for condition, expr, should_return_null in node.cases:
+            self.visit(condition)
+            next_case = self.emit(OP_POP_JUMP_IF_FALSE)
+            self.compile_branch(expr, should_return_null, tail)
+            end_jumps.append(self.emit(OP_JUMP))
+            self.patch(next_case, self.label())
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.compile_branch(expr, should_return_null, tail)
+        else:
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.null))
+
+        for jump in end_jumps:
+            self.patch(jump, self.label())
+
+    def compile_branch(self, expr, should_return_null, tail=False):
+        if tail and not should_return_null:
+            self.compile_tail(expr)
+            return
+        self.visit(expr)
+        if should_return_null:
+            self.emit(OP_POP_TOP)
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.null))
+
+    def compile_IterateNode(self, node):
+        if not node.should_return_null:
+            self.emit(OP_BUILD_LIST, 0, node)
+
+        self.visit(node.start_value_node)
+        self.visit(node.end_value_node)
+        if node.step_value_node:
+            self.visit(node.step_value_node)
+        else:
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.of(1)))
+        self.emit(OP_FOR_RANGE_SETUP, self.code.add_name(node.var_name_tok.value))
+
+        loop = [0, 0]
+        self.code.loops.append(loop)
+        self.emit(OP_SETUP_LOOP, len(self.code.loops) - 1)
+
+        loop[1] = self.label()
+        exit_jump = self.emit(OP_FOR_RANGE_NEXT)
+        self.visit(node.body_node)
+        if node.should_return_null:
+            self.emit(OP_POP_TOP)
+        else:
+            self.emit(OP_LIST_APPEND, 2)
+        self.emit(OP_JUMP, loop[1])
+
+        loop[0] = self.label()
+        self.patch(exit_jump, loop[0])
+        self.emit(OP_POP_BLOCK)
+        self.emit(OP_POP_TOP)
+
+        if node.should_return_null:
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.null))
+
+    def compile_WhileNode(self, node):
+        if not node.should_return_null:
+            self.emit(OP_BUILD_LIST, 0, node)
+
+        loop = [0, 0]
+        self.code.loops.append(loop)
+        self.emit(OP_SETUP_LOOP, len(self.code.loops) - 1)
+
+        loop[1] = self.label()
+        self.visit(node.condition_node)
+        exit_jump = self.emit(OP_POP_JUMP_IF_FALSE)
+        self.visit(node.body_node)
+        if node.should_return_null:
+            self.emit(OP_POP_TOP)
+        else:
+            self.emit(OP_LIST_APPEND, 1)
+        self.emit(OP_JUMP, loop[1])
+
+        loop[0] = self.label()
+        self.patch(exit_jump, loop[0])
+        self.emit(OP_POP_BLOCK)
+
+        if node.should_return_null:
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.null))
+
+    def compile_FuncDefNode(self, node):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        code = Compiler().compile(node.body_node, func_name or '<hidden>', arg_names, node.should_auto_return)
+
+        self.emit(OP_MAKE_FUNCTION, self.code.add_const((func_name, code)), node)
+        if node.var_name_tok:
+            self.emit(OP_STORE_NAME, self.code.add_name(func_name))
+
+    def compile_CallNode(self, node):
+        self.visit(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.visit(arg_node)
+        self.emit(OP_CALL, len(node.arg_nodes), node)
+
+    def compile_tail(self, node):
+        # The value of this expression is what the function returns, so a call
+        # here may run in place of the function's own frame
+        if type(node) is CallNode:
+            self.visit(node.node_to_call)
+            for arg_node in node.arg_nodes:
+                self.visit(arg_node)
+            self.emit(OP_TAIL_CALL, len(node.arg_nodes), node)
+        elif type(node) is IfNode:
+            self.compile_IfNode(node, tail=True)
+        else:
+            self.visit(node)
+
+    def compile_ReturnNode(self, node):
+        if node.node_to_return:
+            self.compile_tail(node.node_to_return)
+        else:
+            self.emit(OP_LOAD_CONST, self.code.add_const(Number.null))
+        self.emit(OP_RETURN_VALUE)
+
+    def compile_ContinueNode(self, node):
+        self.emit(OP_CONTINUE_LOOP)
+
+    def compile_BreakNode(self, node):
+        self.emit(OP_BREAK_LOOP)
+
+    def compile_InlineNode(self, node):
+        self.emit(OP_ENTER_INLINE, self.code.add_const(node.name), node)
+        self.visit(node.body_node)
+        self.emit(OP_EXIT_INLINE)
+
+##############################################
+#               VIRTUAL MACHINE
+##############################################
+
+class CompiledFunction(BaseFunction):
+    __slots__ = ('code',)
+
+    def __init__(self, name, code):
+        super().__init__(name)
+        self.code = code
+
+    def execute(self, args, context, pos_start, pos_end):
+        res = RTResult()
+        exec_ctx = self.generate_new_context(context, pos_start)
+
+        res.register(self.check_and_populate_args(self.code.arg_names, args, exec_ctx, pos_start, pos_end))
+        if res.should_return(): return res
+
+        value = res.register(VM().run(self.code, exec_ctx))
+        if res.should_return() and res.func_return_value == None: return res
+
+        ret_value = (value if self.code.should_auto_return else None) or res.func_return_value or Number.null
+        return res.success(ret_value)
+
+    def copy(self):
+        return CompiledFunction(self.name, self.code)
+
+    def __repr__(self):
+        return f"<function {self.name}>"
+
+# Calls between compiled functions do not use the Python stack. Each one
+# pushes a frame on the VM's own frame stack instead, and is charged
+# VM_FRAME_COST bytes (about what a frame with its Context and SymbolTable
+# takes) against VM_STACK_QUOTA. Both can be changed before calling run().
+VM_STACK_QUOTA = 256 * 1024 * 1024
+VM_FRAME_COST = 1024
+
+class VM:
+    def run(self, code, context):
+        res = RTResult()
+        max_frames = VM_STACK_QUOTA // VM_FRAME_COST
+        frames = []
+        instructions = code.code
+        consts = code.consts
+        names = code.names
+        symbol_table = context.symbol_table
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        blocks = []
+        ip = 0
+
+        while True:
+            op = instructions[ip]
+            arg = instructions[ip + 1]
+            ip += 2
+
+            if op == OP_LOAD_NAME:
+                value = lookup_name(code.name_sites[arg], names[arg], symbol_table)
+                if not value:
+                    pos_start, pos_end = code.positions[ip - 2]
+                    return res.failiure(RTError(
+                        pos_start, pos_end,
+                        f"Variable '{names[arg]}' is not defined!!",
+                        context
+                    ))
+                push(value)
+
+            elif op == OP_LOAD_CONST:
+                push(consts[arg])
+
+            elif op == OP_BINARY_OP:
+                right = pop()
+                left = stack[-1]
+                result, error = getattr(left, BINARY_OP_NAMES[arg])(right)
+                if error:
+                    return res.failiure(self.relocate(error, code, ip, context))
+                stack[-1] = result
+
+            elif op == OP_STORE_NAME:
+                symbol_table.set(names[arg], stack[-1])
+
+            elif op == OP_POP_TOP:
+                pop()
+
+            elif op == OP_POP_JUMP_IF_FALSE:
+                if not pop().is_true():
+                    ip = arg
+
+            elif op == OP_JUMP:
+                ip = arg
+
+            elif op == OP_FOR_RANGE_NEXT:
+                state = stack[-1]
+                i = state[0]
+                if (i < state[1].value) if state[2] >= 0 else (i > state[1].value):
+                    symbol_table.set(state[3], Number.of(i))
+                    state[0] = i + state[2]
+                else:
+                    ip = arg
+
+            elif op == OP_LIST_APPEND:
+                value = pop()
+                list_ = stack[-arg]
+                list_.vector = list_.vector.append(value)
+
+            elif op == OP_CALL or op == OP_TAIL_CALL:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                pos_start, pos_end = code.positions[ip - 2]
+                value_to_call = pop()
+
+                # A memo function over compiled code runs its misses in this loop
+                # too; the frame carries the cache entry its return value fills
+                memo = None
+                if type(value_to_call) is MemoFunction and type(value_to_call.function) is CompiledFunction:
+                    key = value_to_call.key(args)
+                    cached = value_to_call.cache.get(key)
+                    if cached is not None:
+                        push(cached.copy())
+                        continue
+                    memo = (value_to_call.cache, key)
+                    value_to_call = value_to_call.function
+
+                if type(value_to_call) is CompiledFunction and op == OP_TAIL_CALL and frames and memo is None:
+                    # The callee returns straight to our caller. Scoping is dynamic,
+                    # so it starts from the bindings the dropped frame could show it
+                    exec_ctx = value_to_call.generate_new_context(context.parent, pos_start)
+                    for name, binding in context.symbol_table.bindings():
+                        exec_ctx.symbol_table.set(name, binding)
+                    call_res = value_to_call.check_and_populate_args(value_to_call.code.arg_names, args, exec_ctx, pos_start, pos_end)
+                    if call_res.error:
+                        return res.failiure(call_res.error)
+
+                    code = value_to_call.code
+                    instructions, consts, names = code.code, code.consts, code.names
+                    context = exec_ctx
+                    symbol_table = context.symbol_table
+                    stack = []
+                    push, pop = stack.append, stack.pop
+                    blocks = []
+                    ip = 0
+                    continue
+
+                if type(value_to_call) is CompiledFunction:
+                    if len(frames) >= max_frames:
+                        return res.failiure(RTError(
+                            pos_start, pos_end,
+                            f"Maximum recursion depth exceeded ({len(frames)} calls used up the {VM_STACK_QUOTA / (1024 * 1024):g} MB stack quota)",
+                            context
+                        ))
+                    exec_ctx = value_to_call.generate_new_context(context, pos_start)
+                    call_res = value_to_call.check_and_populate_args(value_to_call.code.arg_names, args, exec_ctx, pos_start, pos_end)
+                    if call_res.error:
+                        return res.failiure(call_res.error)
+
+                    frames.append((code, ip, stack, blocks, context, memo))
+                    code = value_to_call.code
+                    instructions, consts, names = code.code, code.consts, code.names
+                    context = exec_ctx
+                    symbol_table = context.symbol_table
+                    stack = []
+                    push, pop = stack.append, stack.pop
+                    blocks = []
+                    ip = 0
+                    continue
+
+                call_res = value_to_call.execute(args, context, pos_start, pos_end)
+                if call_res.error:
+                    return res.failiure(call_res.error)
+                if call_res.loop_should_break or call_res.loop_should_continue:
+                    if not blocks: return call_res
+                    ip = self.unwind(stack, blocks, call_res.loop_should_break)
+                else:
+                    push(call_res.value)
+
+            elif op == OP_BUILD_LIST:
+                elements = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                push(List(elements))
+
+            elif op == OP_STRING_EQ:
+                right = pop()
+                left = stack[-1]
+                if not isinstance(left, String):
+                    pos_start, pos_end = code.positions[ip - 2]
+                    return res.failiure(RTError(pos_start, pos_end, "=` can only be used for string comparison", context))
+                result, error = left.get_string_eq(right)
+                if error:
+                    return res.failiure(self.relocate(error, code, ip, context))
+                stack[-1] = result
+
+            elif op == OP_UNARY_NEG:
+                result, error = stack[-1].multed_by(Number(-1))
+                if error:
+                    return res.failiure(self.relocate(error, code, ip, context))
+                stack[-1] = result
+
+            elif op == OP_UNARY_NOT:
+                result, error = stack[-1].notted()
+                if error:
+                    return res.failiure(self.relocate(error, code, ip, context))
+                stack[-1] = result
+
+            elif op == OP_FOR_RANGE_SETUP:
+                step_value = pop()
+                end_value = pop()
+                start_value = pop()
+                push([start_value.value, end_value, step_value.value, names[arg]])
+
+            elif op == OP_SETUP_LOOP:
+                blocks.append((len(stack), code.loops[arg]))
+
+            elif op == OP_POP_BLOCK:
+                blocks.pop()
+
+            elif op == OP_MAKE_FUNCTION:
+                func_name, func_code = consts[arg]
+                push(CompiledFunction(func_name, func_code))
+
+            elif op == OP_RETURN_VALUE or op == OP_END:
+                value = pop()
+                if not frames:
+                    return res.success_return(value) if op == OP_RETURN_VALUE else res.success(value)
+                if op == OP_END and not code.should_auto_return:
+                    value = Number.null
+
+                code, ip, stack, blocks, context, memo = frames.pop()
+                instructions, consts, names = code.code, code.consts, code.names
+                symbol_table = context.symbol_table
+                push, pop = stack.append, stack.pop
+                # Lists can be changed in place by add(), so the cache keeps a copy of its own
+                if memo: memo[0].store(memo[1], value.copy())
+                push(value)
+
+            elif op == OP_ENTER_INLINE:
+                pos_start, _ = code.positions[ip - 2]
+                context = context.inlined(consts[arg], pos_start)
+
+            elif op == OP_EXIT_INLINE:
+                context = context.parent
+
+            elif op == OP_BREAK_LOOP or op == OP_CONTINUE_LOOP:
+                # Outside a loop, break and continue leave the function and act on the caller's loop
+                while not blocks and frames:
+                    code, ip, stack, blocks, context, _ = frames.pop()
+                if not blocks:
+                    return res.success_break() if op == OP_BREAK_LOOP else res.success_continue()
+
+                instructions, consts, names = code.code, code.consts, code.names
+                symbol_table = context.symbol_table
+                push, pop = stack.append, stack.pop
+                ip = self.unwind(stack, blocks, op == OP_BREAK_LOOP)
+
+    def unwind(self, stack, blocks, should_break):
+        depth, (break_ip, continue_ip) = blocks[-1]
+        del stack[depth:]
+        return break_ip if should_break else continue_ip
+
+    def relocate(self, error, code, ip, context):
+        pos_start, pos_end = code.positions[ip - 2]
+        return error.set_pos(pos_start, pos_end).set_context(context)
+
+##############################################
+#               CLOSURE COMPILER
+##############################################
+
+class ClosureFunction(BaseFunction):
+    __slots__ = ('body', 'arg_names', 'should_auto_return')
+
+    def __init__(self, name, body, arg_names, should_auto_return):
+        super().__init__(name)
+        self.body = body
+        self.arg_names = arg_names
+        self.should_auto_return = should_auto_return
+        # invoke() binds the arguments without going through SymbolTable.set
+        scoped_names.add_all(arg_names)
+
+    def invoke(self, args, context, pos_start, pos_end):
+        function = self
+        bindings = None
+
+        while True:
+            if len(args) != len(function.arg_names):
+                res = function.check_args(function.arg_names, args, pos_start, pos_end, context)
+                raise RTErrorException(res.error)
+
+            exec_ctx = Context(function.name, context)
+            exec_ctx.symbol_table = SymbolTable(context.symbol_table)
+            if bindings: exec_ctx.symbol_table.symbols.update(bindings)
+            exec_ctx.symbol_table.symbols.update(zip(function.arg_names, args, strict=True))
+
+            try:
+                value = function.body(exec_ctx)
+                if not function.should_auto_return: value = None
+            except ReturnException as ret:
+                value = ret.value
+            if type(value) is not TailCall: return value or Number.null
+
+            # Run the tail call in place of the finished frame, starting from its bindings
+            function, args = value.function, value.args
+            pos_start, pos_end = value.pos_start, value.pos_end
+            bindings = exec_ctx.symbol_table.symbols
+
+    def execute(self, args, context, pos_start, pos_end):
+        res = RTResult()
+        try:
+            return res.success(self.invoke(args, context, pos_start, pos_end))
+        except RTErrorException as exception:
+            return res.failiure(exception.error)
+        except ContinueException:
+            return res.success_continue()
+        except BreakException:
+            return res.success_break()
+
+    def copy(self):
+        return ClosureFunction(self.name, self.body, self.arg_names, self.should_auto_return)
+
+    def __repr__(self):
+        return f"<function {self.name}>"
+
+def execute_value(value_to_call, args, context, pos_start, pos_end):
+    # Values from outside the closure engine still answer calls with an RTResult
+    res = value_to_call.execute(args, context, pos_start, pos_end)
+    if res.error: raise RTErrorException(res.error)
+    if res.loop_should_continue: raise ContinueException()
+    if res.loop_should_break: raise BreakException()
+    return res.value
+
+class ClosureCompiler:
+    def __init__(self):
+        # Only a function body can hand a tail call back to ClosureFunction.invoke
+        self.in_function = False
+
+    def compile(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'NO COMPILE METHOD DEFINED!!! {type(node).__name__}')
+
+    def run(self, node, context):
+        res = RTResult()
+        program = self.compile(node)
+        try:
+            return res.success(program(context))
+        except RTErrorException as exception:
+            return res.failiure(exception.error)
+        except ReturnException:
+            return res.success_return(None)
+        except ContinueException:
+            return res.success_continue()
+        except BreakException:
+            return res.success_break()
+
+    ##############################################
+
+    def compile_NumberNode(self, node):
+        value = node.value
+        return lambda context: value
+
+    def compile_StringNode(self, node):
+        value = node.value
+        return lambda context: value
+
+    def compile_ListNode(self, node):
+        element_closures = [self.compile(element_node) for element_node in node.element_nodes]
+
+        if node.should_return_null:
+            def statements(context):
+                for element in element_closures:
+                    element(context)
+                return Number.null
+            return statements
+
+        def list_(context):
+            return List([element(context) for element in element_closures])
+        return list_
+
+    def compile_VarAccessNode(self, node):
+        var_name = node.var_name_tok.value
+        pos_start, pos_end = node.pos_start, node.pos_end
+        site = GlobalCache()
+
+        def var_access(context):
+            value = lookup_name(site, var_name, context.symbol_table)
+            if not value:
+                raise RTErrorException(RTError(
+                    pos_start, pos_end,
+                    f"Variable '{var_name}' is not defined!!",
+                    context
+                ))
+            return value
+        return var_access
+
+    def compile_VarAssignNode(self, node):
+        var_name = node.var_name_tok.value
+        value_closure = self.compile(node.value_node)
+
+        def var_assign(context):
+            value = value_closure(context)
+            context.symbol_table.set(var_name, value)
+            return value
+        return var_assign
+
+    def compile_BinOpNode(self, node):
+        left_closure = self.compile(node.left_node)
+        right_closure = self.compile(node.right_node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if node.op_tok.type == ST_SEQ:
+            def string_eq(context):
+                left = left_closure(context)
+                right = right_closure(context)
+                if not isinstance(left, String):
+                    raise RTErrorException(RTError(pos_start, pos_end, "=` can only be used for string comparison", context))
+                result, error = left.get_string_eq(right)
+                if error: raise_relocated(error, pos_start, pos_end, context)
+                return result
+            return string_eq
+
+        op_name = BINARY_OPS[node.op_tok.type]
+
+        def bin_op(context):
+            result, error = getattr(left_closure(context), op_name)(right_closure(context))
+            if error: raise_relocated(error, pos_start, pos_end, context)
+            return result
+        return bin_op
+
+    def compile_UnaryOpNode(self, node):
+        operand_closure = self.compile(node.node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if node.op_tok.type == ST_MINUS:
+            minus_one = Number(-1)
+            def unary_op(context):
+                result, error = operand_closure(context).multed_by(minus_one)
+                if error: raise_relocated(error, pos_start, pos_end, context)
+                return result
+        elif node.op_tok.type == KW_NOT:
+            def unary_op(context):
+                result, error = operand_closure(context).notted()
+                if error: raise_relocated(error, pos_start, pos_end, context)
+                return result
+        else:
+            return operand_closure
+        return unary_op
+
+    def compile_IfNode(self, node, tail=False):
+        cases = [
+            (self.compile(condition), self.compile_branch(expr, should_return_null, tail), should_return_null)
+            for condition, expr, should_return_null in node.cases
+        ]
+        else_closure, else_returns_null = None, True
+        if node.else_case:
+            expr, else_returns_null = node.else_case
+            else_closure = self.compile_branch(expr, else_returns_null, tail)
+
+        def if_(context):
+            for condition, expr, should_return_null in cases:
+                if condition(context).is_true():
+                    value = expr(context)
+                    return Number.null if should_return_null else value
+            if else_closure:
+                value = else_closure(context)
+                return Number.null if else_returns_null else value
+            return Number.null
+        return if_
+
+    def compile_branch(self, expr, should_return_null, tail):
+        # A branch whose value is dropped must run its calls before it gives null
+        return self.compile_tail(expr) if tail and not should_return_null else self.compile(expr)
+
+    def compile_IterateNode(self, node):
+        var_name = node.var_name_tok.value
+        start_closure = self.compile(node.start_value_node)
+        end_closure = self.compile(node.end_value_node)
+        step_closure = self.compile(node.step_value_node) if node.step_value_node else None
+        body_closure = self.compile(node.body_node)
+        should_return_null = node.should_return_null
+
+        def iterate(context):
+            elements = []
+            i = start_closure(context).value
+            end = end_closure(context).value
+            step = step_closure(context).value if step_closure else 1
+            symbol_table = context.symbol_table
+
+            while (i < end) if step >= 0 else (i > end):
+                symbol_table.set(var_name, Number.of(i))
+                i += step
+                try:
+                    value = body_closure(context)
+                except ContinueException:
+                    continue
+                except BreakException:
+                    break
+                if not should_return_null: elements.append(value)
+
+            if should_return_null: return Number.null
+            return List(elements)
+        return iterate
+
+    def compile_WhileNode(self, node):
+        condition_closure = self.compile(node.condition_node)
+        body_closure = self.compile(node.body_node)
+        should_return_null = node.should_return_null
+
+        def while_(context):
+            elements = []
+
+            while condition_closure(context).is_true():
+                try:
+                    value = body_closure(context)
+                except ContinueException:
+                    continue
+                except BreakException:
+                    break
+                if not should_return_null: elements.append(value)
+
+            if should_return_null: return Number.null
+            return List(elements)
+        return while_
+
+    def compile_FuncDefNode(self, node):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        should_auto_return = node.should_auto_return
+
+        in_function, self.in_function = self.in_function, True
+        body_closure = self.compile_tail(node.body_node) if should_auto_return else self.compile(node.body_node)
+        self.in_function = in_function
+
+        def func_def(context):
+            func_value = ClosureFunction(func_name, body_closure, arg_names, should_auto_return)
+            if func_name:
+                context.symbol_table.set(func_name, func_value)
+            return func_value
+        return func_def
+
+    def compile_CallNode(self, node):
+        callee_closure = self.compile(node.node_to_call)
+        arg_closures = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def call(context):
+            value_to_call = callee_closure(context)
+            args = [arg(context) for arg in arg_closures]
+
+            if type(value_to_call) is ClosureFunction:
+                return value_to_call.invoke(args, context, pos_start, pos_end)
+            return execute_value(value_to_call, args, context, pos_start, pos_end)
+        return call
+
+    def compile_tail(self, node):
+        # The value of this expression is what the function returns, so a call
+        # here comes back as a TailCall for ClosureFunction.invoke to run in its place
+        if type(node) is IfNode: return self.compile_IfNode(node, tail=True)
+        if type(node) is not CallNode: return self.compile(node)
+
+        callee_closure = self.compile(node.node_to_call)
+        arg_closures = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def tail_call(context):
+            value_to_call = callee_closure(context)
+            args = [arg(context) for arg in arg_closures]
+
+            if type(value_to_call) is ClosureFunction:
+                return TailCall(value_to_call, args, pos_start, pos_end)
+            return execute_value(value_to_call, args, context, pos_start, pos_end)
+        return tail_call
+
+    def compile_ReturnNode(self, node):
+        if not node.node_to_return:
+            value_closure = None
+        elif self.in_function:
+            value_closure = self.compile_tail(node.node_to_return)
+        else:
+            value_closure = self.compile(node.node_to_return)
+
+        def return_(context):
+            raise ReturnException(value_closure(context) if value_closure else Number.null)
+        return return_
+
+    def compile_ContinueNode(self, node):
+        def continue_(context):
+            raise ContinueException()
+        return continue_
+
+    def compile_BreakNode(self, node):
+        def break_(context):
+            raise BreakException()
+        return break_
+
+    def compile_InlineNode(self, node):
+        body_closure = self.compile(node.body_node)
+        name, pos_start = node.name, node.pos_start
+
+        def inline(context):
+            return body_closure(context.inlined(name, pos_start))
+        return inline
+
+##############################################
+#               PYTHON TRANSPILER
+##############################################
+
+class PythonFunction(ClosureFunction):
+    __slots__ = ()
+
+    def invoke(self, args, context, pos_start, pos_end):
+        function = self
+        bindings = None
+
+        while True:
+            if len(args) != len(function.arg_names):
+                res = function.check_args(function.arg_names, args, pos_start, pos_end, context)
+                raise RTErrorException(res.error)
+
+            exec_ctx = Context(function.name, context)
+            exec_ctx.symbol_table = SymbolTable(context.symbol_table)
+            if bindings: exec_ctx.symbol_table.symbols.update(bindings)
+            exec_ctx.symbol_table.symbols.update(zip(function.arg_names, args, strict=True))
+
+            value = function.body(exec_ctx)
+            if type(value) is not TailCall: return value
+
+            function, args = value.function, value.args
+            pos_start, pos_end = value.pos_start, value.pos_end
+            bindings = exec_ctx.symbol_table.symbols
+
+    def copy(self):
+        return PythonFunction(self.name, self.body, self.arg_names, self.should_auto_return)
+
+def py_call(value_to_call, args, context, pos):
+    if type(value_to_call) is PythonFunction:
+        return value_to_call.invoke(args, context, pos[0], pos[1])
+
+    res = value_to_call.execute(args, context, pos[0], pos[1])
+    if res.error: raise RTErrorException(res.error)
+    if res.loop_should_continue: raise ContinueException()
+    if res.loop_should_break: raise BreakException()
+    return res.value
+
+def py_tail_call(value_to_call, args, context, pos):
+    if type(value_to_call) is PythonFunction:
+        return TailCall(value_to_call, args, pos[0], pos[1])
+    return execute_value(value_to_call, args, context, pos[0], pos[1])
+
+def py_fail(error, pos, context):
+    raise_relocated(error, pos[0], pos[1], context)
+
+def py_undefined(var_name, pos, context):
+    raise RTErrorException(RTError(
+        pos[0], pos[1],
+        f"Variable '{var_name}' is not defined!!",
+        context
+    ))
+
+def py_string_eq(left, right, pos, context):
+    if not isinstance(left, String):
+        raise RTErrorException(RTError(pos[0], pos[1], "=` can only be used for string comparison", context))
+    result, error = left.get_string_eq(right)
+    if error: py_fail(error, pos, context)
+    return result
+
+PYTHON_RUNTIME = {
+    'Number': Number,
+    'List': List,
+    'PythonFunction': PythonFunction,
+    'ContinueException': ContinueException,
+    'BreakException': BreakException,
+    'call': py_call,
+    'tail_call': py_tail_call,
+    'fail': py_fail,
+    'undefined': py_undefined,
+    'string_eq': py_string_eq,
+    'iterate_range': iterate_range,
+    'lookup_name': lookup_name,
+}
+
+class PythonTranspiler:
+    cache = MemoCache(PYTHON_CODE_CACHE_SIZE)
+
+    def run(self, node, context):
+        res = RTResult()
+        source = self.transpile(node)
+
+        # Keyed by a digest so the cache does not also hold on to every generated source
+        key = hashlib.sha256(source.encode()).digest()
+        code = self.cache.get(key)
+        if code is None:
+            try:
+                code = compile(source, '<swiftcode>', 'exec')
+            except (SyntaxError, RecursionError):
+                # Python caps how deeply blocks and indentation may nest; programs
+                # past that run on the closure engine instead
+                code = False
+            self.cache.store(key, code)
+        if code is False: return ClosureCompiler().run(node, context)
+
+        namespace = dict(PYTHON_RUNTIME)
+        namespace['P'] = self.positions
+        namespace['K'] = self.consts
+        exec(code, namespace)
+
+        try:
+            return res.success(namespace['program'](context))
+        except RTErrorException as exception:
+            return res.failiure(exception.error)
+        except ContinueException:
+            return res.success_continue()
+        except BreakException:
+            return res.success_break()
+
+    def transpile(self, node):
+        self.blocks = []
+        self.positions = []
+        self.consts = []
+        self.const_names = {}
+        self.temp_count = 0
+        self.func_count = 0
+        self.lines = []
+        self.indent = 0
+        self.loop_depth = 0
+        self.is_program = True
+
+        self.write_function('program', node, True, True)
+        header = [f'k{i} = K[{i}]' for i in range(len(self.consts))]
+        return '\n'.join(header + self.blocks) + '\n'
+
+    def write_function(self, name, body_node, should_auto_return, is_program=False):
+        saved = self.lines, self.indent, self.loop_depth, self.is_program
+        self.lines = [f'def {name}(context):']
+        self.indent = 1
+        self.loop_depth = 0
+        self.is_program = is_program
+
+        self.write('st = context.symbol_table')
+        value = self.transpile_tail(body_node) if should_auto_return and not is_program else self.visit(body_node)
+        self.write(f'return {value}' if should_auto_return else 'return Number.null')
+        self.blocks.append('\n'.join(self.lines))
+
+        self.lines, self.indent, self.loop_depth, self.is_program = saved
+
+    def visit(self, node):
+        method_name = f'transpile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_transpile_method)
+        return method(node)
+
+    def no_transpile_method(self, node):
+        raise Exception(f'NO TRANSPILE METHOD DEFINED!!! {type(node).__name__}')
+
+    def write(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def temp(self):
+        self.temp_count += 1
+        return f't{self.temp_count}'
+
+    def pos(self, node):
+        self.positions.append((node.pos_start, node.pos_end))
+        return f'P[{len(self.positions) - 1}]'
+
+    def const(self, value):
+        if id(value) not in self.const_names:
+            self.const_names[id(value)] = f'k{len(self.consts)}'
+            self.consts.append(value)
+        return self.const_names[id(value)]
+
+    ##############################################
+
+    def transpile_NumberNode(self, node):
+        return self.const(node.value)
+
+    def transpile_StringNode(self, node):
+        return self.const(node.value)
+
+    def transpile_ListNode(self, node):
+        elements = [self.visit(element_node) for element_node in node.element_nodes]
+        if node.should_return_null: return 'Number.null'
+
+        result = self.temp()
+        self.write(f'{result} = List([{", ".join(elements)}])')
+        return result
+
+    def transpile_VarAccessNode(self, node):
+        var_name = repr(node.var_name_tok.value)
+        result = self.temp()
+        self.write(f'{result} = lookup_name({self.const(GlobalCache())}, {var_name}, st)')
+        self.write(f'if {result} is None: undefined({var_name}, {self.pos(node)}, context)')
+        return result
+
+    def transpile_VarAssignNode(self, node):
+        value = self.visit(node.value_node)
+        self.write(f'st.set({node.var_name_tok.value!r}, {value})')
+        return value
+
+    def transpile_BinOpNode(self, node):
+        left = self.visit(node.left_node)
+        right = self.visit(node.right_node)
+        result = self.temp()
+
+        if node.op_tok.type == ST_SEQ:
+            self.write(f'{result} = string_eq({left}, {right}, {self.pos(node)}, context)')
+            return result
+
+        op_name = BINARY_OPS[node.op_tok.type]
+        self.write(f'{result}, error = {left}.{op_name}({right})')
+        self.write(f'if error: fail(error, {self.pos(node)}, context)')
+        return result
+
+    def transpile_UnaryOpNode(self, node):
+        operand = self.visit(node.node)
+        result = self.temp()
+
+        if node.op_tok.type == ST_MINUS:
+            self.write(f'{result}, error = {operand}.multed_by({self.const(Number(-1))})')
+        elif node.op_tok.type == KW_NOT:
+            self.write(f'{result}, error = {operand}.notted()')
+        else:
+            return operand
+        self.write(f'if error: fail(error, {self.pos(node)}, context)')
+        return result
+
+    def transpile_tail(self, node):
+        # A call whose value is returned as is leaves a TailCall for PythonFunction.invoke to run
+        if type(node) is CallNode:
+            value_to_call = self.visit(node.node_to_call)
+            args = [self.visit(arg_node) for arg_node in node.arg_nodes]
+            result = self.temp()
+            self.write(f'{result} = tail_call({value_to_call}, [{", ".join(args)}], context, {self.pos(node)})')
+            return result
+        if type(node) is IfNode:
+            return self.transpile_IfNode(node, tail=True)
+        return self.visit(node)
+
+    def transpile_IfNode(self, node, tail=False):
+        # Each case is guarded by a flag instead of nesting inside the previous
+        # case's else, so long chains stay within Python's indentation limit
+        result, matched = self.temp(), self.temp()
+        indent = self.indent
+        self.write(f'{matched} = False')
+
+        for i, (condition, expr, should_return_null) in enumerate(node.cases):
+            if i:
+                self.indent = indent
+                self.write(f'if not {matched}:')
+                self.indent += 1
+            condition_value = self.visit(condition)
+            self.write(f'if {condition_value}.is_true():')
+            self.indent += 1
+            self.write(f'{matched} = True')
+            self.transpile_branch(result, expr, should_return_null, tail)
+            self.indent -= 1
+
+        self.indent = indent
+        self.write(f'if not {matched}:')
+        self.indent += 1
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.transpile_branch(result, expr, should_return_null, tail)
+        else:
+            self.write(f'{result} = Number.null')
+
+        self.indent = indent
+        return result
+
+    def transpile_branch(self, result, expr, should_return_null, tail=False):
+        value = self.transpile_tail(expr) if tail and not should_return_null else self.visit(expr)
+        self.write(f'{result} = {"Number.null" if should_return_null else value}')
+
+    def transpile_IterateNode(self, node):
+        start_value = self.visit(node.start_value_node)
+        end_value = self.visit(node.end_value_node)
+        step_value = self.visit(node.step_value_node) if node.step_value_node else self.const(Number.of(1))
+        elements, i, result = self.temp(), self.temp(), self.temp()
+
+        if not node.should_return_null:
+            self.write(f'{elements} = []')
+        self.write(f'for {i} in iterate_range({start_value}.value, {end_value}.value, {step_value}.value):')
+        self.indent += 1
+        self.write(f'st.set({node.var_name_tok.value!r}, Number.of({i}))')
+        self.transpile_loop_body(node.body_node, elements, node.should_return_null)
+        self.indent -= 1
+
+        self.transpile_loop_result(node, elements, result)
+        return result
+
+    def transpile_WhileNode(self, node):
+        elements, result = self.temp(), self.temp()
+
+        if not node.should_return_null:
+            self.write(f'{elements} = []')
+        self.write('while True:')
+        self.indent += 1
+        condition_value = self.visit(node.condition_node)
+        self.write(f'if not {condition_value}.is_true(): break')
+        self.transpile_loop_body(node.body_node, elements, node.should_return_null)
+        self.indent -= 1
+
+        self.transpile_loop_result(node, elements, result)
+        return result
+
+    def transpile_loop_body(self, body_node, elements, should_return_null):
+        self.loop_depth += 1
+        # continue and destroy in the body itself become Python's own; only a
+        # call can raise them from further down, so only then is a try needed
+        catches = self.may_call(body_node)
+        if catches:
+            self.write('try:')
+            self.indent += 1
+        value = self.visit(body_node)
+        if catches:
+            self.indent -= 1
+            self.write('except ContinueException: continue')
+            self.write('except BreakException: break')
+        if not should_return_null:
+            self.write(f'{elements}.append({value})')
+        self.loop_depth -= 1
+
+    def may_call(self, node):
+        if isinstance(node, (list, tuple)):
+            return any(self.may_call(child) for child in node)
+        if not isinstance(node, Spanned) or isinstance(node, Token): return False
+
+        if type(node) is CallNode: return True
+        # Calls in a function are made when it runs, and a nested loop catches what its body raises
+        if type(node) is FuncDefNode: return False
+        slots = type(node).__slots__
+        if type(node) is IterateNode or type(node) is WhileNode:
+            slots = [slot for slot in slots if slot != 'body_node']
+        return any(self.may_call(getattr(node, slot, None)) for slot in slots)
+
+    def transpile_loop_result(self, node, elements, result):
+        if node.should_return_null:
+            self.write(f'{result} = Number.null')
+        else:
+            self.write(f'{result} = List({elements})')
+
+    def transpile_FuncDefNode(self, node):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        self.func_count += 1
+        py_name = f'funct{self.func_count}'
+        self.write_function(py_name, node.body_node, node.should_auto_return)
+
+        result = self.temp()
+        self.write(f'{result} = PythonFunction({func_name!r}, {py_name}, {arg_names!r}, {node.should_auto_return})')
+        if func_name:
+            self.write(f'st.set({func_name!r}, {result})')
+        return result
+
+    def transpile_CallNode(self, node):
+        value_to_call = self.visit(node.node_to_call)
+        args = [self.visit(arg_node) for arg_node in node.arg_nodes]
+        result = self.temp()
+        self.write(f'{result} = call({value_to_call}, [{", ".join(args)}], context, {self.pos(node)})')
+        return result
+
+    def transpile_ReturnNode(self, node):
+        if not node.node_to_return:
+            value = 'Number.null'
+        elif self.is_program:
+            value = self.visit(node.node_to_return)
+        else:
+            value = self.transpile_tail(node.node_to_return)
+        self.write('return None' if self.is_program else f'return {value}')
+        return 'Number.null'
+
+    def transpile_ContinueNode(self, node):
+        self.write('continue' if self.loop_depth else 'raise ContinueException()')
+        return 'Number.null'
+
+    def transpile_BreakNode(self, node):
+        self.write('break' if self.loop_depth else 'raise BreakException()')
+        return 'Number.null'
+
+    def transpile_InlineNode(self, node):
+        caller = self.temp()
+        self.write(f'{caller} = context')
+        self.write(f'context = {caller}.inlined({node.name!r}, {self.pos(node)}[0])')
+        value = self.visit(node.body_node)
+        self.write(f'context = {caller}')
+        return value
+
+##############################################
+#               AST CACHE
+##############################################
+
+AST_CACHE_DIR = '__swcache__'
+
+def ast_layout_tag():
+    # Entries written by a build with a different node layout must not load
+    classes = [Source, Token, Number, String] + [cls for cls in Spanned.__subclasses__() if cls is not Token]
+    layout = repr([(cls.__name__, cls.__slots__) for cls in classes])
+    return hashlib.sha256(layout.encode()).hexdigest()[:16]
+
+class ASTCache:
+    def __init__(self):
+        self.layout_tag = ast_layout_tag()
+
+    def entry_path(self, fn):
+        directory, name = os.path.split(os.path.abspath(fn))
+        return os.path.join(directory, AST_CACHE_DIR, name + '.ast')
+
+    def key(self, fn, text):
+        try:
+            mtime = os.stat(fn).st_mtime_ns
+        except OSError:
+            return None
+        digest = hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+        return (self.layout_tag, os.path.abspath(fn), mtime, digest)
+
+    def load(self, fn, text):
+        key = self.key(fn, text)
+        if key is None: return None
+
+        # Unpickling allocates the whole tree at once, and the cyclic GC would
+        # otherwise rescan it many times over while it is being built
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            # Entries are trusted input: they are written by store() into a directory next to
+            # the source, and anyone who can write there can change the .swco file itself
+            with open(self.entry_path(fn), 'rb') as f:
+                if pickle.load(f) != key: return None  # nosec B301
+                return pickle.loads(zlib.decompress(f.read()))  # nosec B301
+        except Exception:
+            # Missing, truncated or otherwise corrupt entries are just rebuilt
+            return None
+        finally:
+            if gc_was_enabled: gc.enable()
+
+    def store(self, fn, text, node):
+        key = self.key(fn, text)
+        if key is None: return
+
+        path = self.entry_path(fn)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                pickle.dump(key, f, pickle.HIGHEST_PROTOCOL)
+                f.write(zlib.compress(pickle.dumps(node, pickle.HIGHEST_PROTOCOL)))
+            os.replace(temp_path, path)
+        except (OSError, pickle.PicklingError, RecursionError):
+            # A read-only directory or a tree too deep to pickle only costs the cache
+            if os.path.exists(temp_path): os.remove(temp_path)
+
+ast_cache = ASTCache()
+
+##############################################
+#               MODULES
+##############################################
+
+class Module:
+    def __init__(self, fn, symbol_table):
+        self.fn = fn
+        self.symbol_table = symbol_table
+
+    def exports(self):
+        return list(self.symbol_table.symbols.items())
+
+class ModuleRegistry:
+    def __init__(self):
+        self.modules = {}
+
+    def load(self, fn, engine='tree', optimize=0, cache=True):
+        path = os.path.abspath(fn)
+        module = self.modules.get(path)
+        if module: return module, None
+
+        try:
+            with open(fn, "r") as f:
+                script = f.read()
+        except Exception as e:
+            return None, f"Failed to import swiftcode file {fn}\n" + str(e)
+
+        node, error = parse(fn, script, cache)
+        if error: return None, f"Failed to import swiftcode file {fn}\n" + error.as_string()
+
+        context = Context(f'<module {fn}>', engine=engine, optimize=optimize, cache=cache)
+        context.symbol_table = SymbolTable(global_symbol_table)
+
+        # Registered before it runs, so a circular import sees the names defined so far
+        module = Module(fn, context.symbol_table)
+        self.modules[path] = module
+
+        result = execute(node, context)
+        if result.error:
+            del self.modules[path]
+            return None, f"Failed to finish executing module {fn}\n" + result.error.as_string()
+
+        return module, None
+
+module_registry = ModuleRegistry()
 
 ##############################################
 #               RUN
 ##############################################
 
-global_symbol_table = SymbolTable()
+global_symbol_table = GlobalSymbolTable()
 global_symbol_table.set("null", Number.null)
 global_symbol_table.set("true", Number.true)
 global_symbol_table.set("false", Number.false)
@@ -2222,11 +4637,14 @@ global_symbol_table.set("isnum", BuiltInFunction.is_number)
 global_symbol_table.set("isstr", BuiltInFunction.is_string)
 global_symbol_table.set("islist", BuiltInFunction.is_list)
 global_symbol_table.set("isfunct", BuiltInFunction.is_function)
+global_symbol_table.set("memo", BuiltInFunction.memo)
+global_symbol_table.set("memostats", BuiltInFunction.memostats)
 global_symbol_table.set("add", BuiltInFunction.append)
 global_symbol_table.set("remove", BuiltInFunction.pop)
 global_symbol_table.set("extend", BuiltInFunction.extend)
 global_symbol_table.set("lenl", BuiltInFunction.len)
 global_symbol_table.set("frun", BuiltInFunction.run)
+global_symbol_table.set("import", BuiltInFunction.import_)
 global_symbol_table.set("termp", BuiltInFunction.termp)
 global_symbol_table.set("s", Number(1))
 global_symbol_table.set("m", Number(60))
@@ -2243,8 +4661,16 @@ global_symbol_table.set("writefile", BuiltInFunction("writefile"))
 global_symbol_table.set("appendfile", BuiltInFunction("appendfile"))
 global_symbol_table.set("filefound", BuiltInFunction("filefound"))
 
+# What the optimizer may substitute for CONSTANT_NAMES while they are not rebound
+BUILTIN_CONSTANTS = {name: global_symbol_table.get(name) for name in CONSTANT_NAMES}
+
+
+def parse(fn, text, cache=True):
+    # Source files that were parsed before load straight from the AST cache
+    if cache:
+        node = ast_cache.load(fn, text)
+        if node is not None: return node, None
 
-def run(fn, text):
     # Gen Tokens
     lexer = Lexer(fn, text)
     tokens, error = lexer.make_tokens()
@@ -2254,9 +4680,43 @@ def run(fn, text):
     parser = Parser(tokens)
     ast = parser.parse()
     if ast.error: return None, ast.error
+
+    if cache: ast_cache.store(fn, text, ast.node)
+    return ast.node, None
+
+def execute(node, context):
+    node = Optimizer(context.optimize).optimize(node)
+    # The value of the whole program is what the shell prints, so it counts as used
+    ResultUsage().mark(node)
+    engine = context.engine
+    try:
+        if engine == 'tree':
+            Resolver().resolve(node)
+            result = Interpreter().run(node, context)
+        elif engine == 'vm':
+            code = Compiler().compile(node)
+            result = VM().run(code, context)
+        elif engine == 'closure':
+            result = ClosureCompiler().run(node, context)
+        elif engine == 'python':
+            result = PythonTranspiler().run(node, context)
+        else:
+            raise Exception(f'NO ENGINE DEFINED!!! {engine}')
+    except RecursionError:
+        # Engines that recurse on the Python stack run out of it long before the
+        # VM's own quota; report that as an error instead of crashing the caller
+        result = RTResult().failiure(RTError(
+            node.pos_start, node.pos_end,
+            'Maximum recursion depth exceeded',
+            context
+        ))
+    return result
+
+def run(fn, text, engine='tree', cache=True, optimize=0):
+    node, error = parse(fn, text, cache)
+    if error: return None, error
     #Run
-    interpreter = Interpreter()
-    context = Context('<code>')
+    context = Context('<code>', engine=engine, optimize=optimize, cache=cache)
     context.symbol_table = global_symbol_table
-    result = interpreter.visit(ast.node, context)
+    result = execute(node, context)
     return result.value, result.error
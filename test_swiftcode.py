@@ -0,0 +1,376 @@
+import itertools
+import pathlib
+
+import pytest
+
+import swiftcode
+
+ENGINES = ['tree', 'vm', 'closure', 'python']
+EXAMPLES = pathlib.Path(__file__).parent / 'examples'
+
+
+def run_program(capsys, text, engine, optimize=0):
+    value, error = swiftcode.run('<test>', text, engine=engine, cache=False, optimize=optimize)
+    assert error is None, error.as_string()
+    return capsys.readouterr().out
+
+
+def assert_same_output(capsys, text, expected, optimize=0):
+    for engine in ENGINES:
+        assert run_program(capsys, text, engine, optimize) == expected, engine
+
+
+@pytest.mark.parametrize('optimize', [0, 2])
+def test_unary_plus(capsys, optimize):
+    text = '\n'.join([
+        'variable x = 3',
+        'show(+5)',
+        'show(+0)',
+        'show(+x)',
+        'show(-+x)',
+        'show(+"x")',
+        'show(not +0)',
+    ])
+    assert_same_output(capsys, text, '5\n0\n3\n-3\nx\n1\n', optimize)
+
+
+def test_if_chain_runs_only_the_matching_case(capsys):
+    text = '\n'.join([
+        'funct loud(n, result)',
+        '    show(n)',
+        '    give result',
+        'finish',
+        'if loud(1, 0) then',
+        '    show("a")',
+        'ifnot loud(2, 1) then',
+        '    show("b")',
+        'ifnot loud(3, 1) then',
+        '    show("c")',
+        'finish',
+        'show(if 0 then 1 ifnot 0 then 2 else 3)',
+    ])
+    assert_same_output(capsys, text, '1\n2\nb\n3\n')
+
+
+def test_long_if_chain(capsys):
+    cases = ''.join(f'ifnot x == {i} then\n    show({i})\n' for i in range(1, 150))
+    text = f'variable x = 149\nif x == 0 then\n    show(0)\n{cases}else\n    show(-1)\nfinish'
+    assert_same_output(capsys, text, '149\n')
+
+
+@pytest.mark.parametrize('depth', [12, 25])
+def test_deeply_nested_loops(capsys, depth):
+    loops = ''.join(f'iterate v{i} = 0 until 1 then ' for i in range(depth))
+    assert_same_output(capsys, f'{loops}show(v{depth - 1})', '0\n')
+
+
+def test_memo_keeps_ints_and_floats_apart(capsys):
+    text = '\n'.join([
+        'funct same(n) -> n',
+        'variable same = memo(same)',
+        'show(same(1.0))',
+        'show(same(1))',
+        'show(same(1.0))',
+    ])
+    assert_same_output(capsys, text, '1.0\n1\n1.0\n')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_frun_and_import_follow_the_cache_setting(capsys, tmp_path, engine):
+    script = tmp_path / 'script.swco'
+    script.write_text('show("ran")')
+    module = tmp_path / 'module.swco'
+    module.write_text('funct double(n) -> n * 2')
+    text = f'frun("{script.as_posix()}")\nvariable m = import("{module.as_posix()}")\nshow(double(21))'
+
+    value, error = swiftcode.run('<test>', text, engine=engine, cache=False)
+    assert error is None, error.as_string()
+    assert capsys.readouterr().out == 'ran\n42\n'
+    assert not (tmp_path / swiftcode.AST_CACHE_DIR).exists()
+
+    script.write_text('show("again")')
+    value, error = swiftcode.run('<test>', f'frun("{script.as_posix()}")', engine=engine)
+    assert error is None, error.as_string()
+    assert capsys.readouterr().out == 'again\n'
+    assert (tmp_path / swiftcode.AST_CACHE_DIR / 'script.swco.ast').exists()
+
+
+def test_folding_stops_at_the_size_limit(capsys):
+    factor = '123456789012345678901234567890'
+    text = f'show({" * ".join([factor] * 200)} > 0)'
+    node, error = swiftcode.parse('<test>', text, False)
+    assert error is None
+    node = swiftcode.Optimizer(2).optimize(node)
+
+    literals = []
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, swiftcode.NumberNode):
+            literals.append(current.value.value)
+        for slot in type(current).__slots__:
+            child = getattr(current, slot, None)
+            for item in child if isinstance(child, (list, tuple)) else [child]:
+                if isinstance(item, swiftcode.Spanned):
+                    pending.append(item)
+    assert max(value.bit_length() for value in literals) <= swiftcode.FOLD_SIZE_LIMIT
+
+    for optimize in [0, 2]:
+        assert_same_output(capsys, text, '1\n', optimize)
+
+
+@pytest.mark.parametrize('name', ['formatify', 'math', 'simple_calc', 'spoof'])
+def test_examples_agree_across_engines(capsys, monkeypatch, name):
+    path = EXAMPLES / f'{name}.swco'
+    text = path.read_text()
+    answers = itertools.cycle(['6', '3'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+
+    outputs = {}
+    for engine in ENGINES:
+        for optimize in [0, 1, 2]:
+            value, error = swiftcode.run(str(path), text, engine=engine, cache=False, optimize=optimize)
+            outputs[engine, optimize] = (capsys.readouterr().out, repr(value), error and error.as_string())
+
+    expected = outputs['tree', 0]
+    assert expected[0] and expected[2] is None
+    for key, output in outputs.items():
+        assert output == expected, key
+
+
+def test_errors_agree_across_engines(capsys):
+    programs = [
+        'show(1 + "a")',
+        'show(10 / 0)',
+        'funct f(a)\n    give a + "x"\nfinish\nf(1)',
+        'funct g(a, b) -> a\ng(1)',
+        'variable l = [1, 2]\nshow(l / 5)',
+        'show(missing)',
+        'show("a" =` 1)',
+    ]
+    for text in programs:
+        errors = {}
+        for engine in ENGINES:
+            value, error = swiftcode.run('<test>', text, engine=engine, cache=False)
+            errors[engine] = error.as_string()
+        assert len(set(errors.values())) == 1, errors
+    capsys.readouterr()
+
+
+def test_python_code_cache_is_bounded(capsys):
+    cache = swiftcode.PythonTranspiler.cache
+    for i in range(swiftcode.PYTHON_CODE_CACHE_SIZE + 10):
+        # Literals live in a constant pool, so only a new name gives new source
+        run_program(capsys, f'variable cached{i} = 1', 'python')
+    assert len(cache.results) == swiftcode.PYTHON_CODE_CACHE_SIZE
+
+    hits = cache.hits
+    run_program(capsys, f'variable cached{swiftcode.PYTHON_CODE_CACHE_SIZE + 9} = 2', 'python')
+    assert cache.hits == hits + 1
+
+
+def test_ast_cache_reuses_entries_until_the_source_changes(capsys, tmp_path):
+    path = tmp_path / 'cached.swco'
+    text = 'funct twice(n) -> n * 2\nshow(twice(21))'
+    path.write_text(text)
+    fn = str(path)
+    entry = tmp_path / swiftcode.AST_CACHE_DIR / 'cached.swco.ast'
+
+    assert swiftcode.ast_cache.load(fn, text) is None
+    for engine in ENGINES:
+        value, error = swiftcode.run(fn, text, engine=engine)
+        assert error is None, error.as_string()
+        assert capsys.readouterr().out == '42\n'
+    assert entry.exists()
+    assert swiftcode.ast_cache.load(fn, text) is not None
+
+    changed = 'show(7)'
+    path.write_text(changed)
+    assert swiftcode.ast_cache.load(fn, changed) is None
+    value, error = swiftcode.run(fn, changed)
+    assert error is None, error.as_string()
+    assert capsys.readouterr().out == '7\n'
+
+    # A corrupt entry is rebuilt instead of failing the run
+    entry.write_bytes(b'not a cache entry')
+    value, error = swiftcode.run(fn, changed)
+    assert error is None, error.as_string()
+    assert capsys.readouterr().out == '7\n'
+    assert swiftcode.ast_cache.load(fn, changed) is not None
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_import_runs_a_module_once(capsys, tmp_path, engine):
+    module = tmp_path / 'shapes.swco'
+    module.write_text('show("loading")\nvariable sides = 4\nfunct area(n) -> n * n')
+    broken = tmp_path / 'broken.swco'
+    broken.write_text('show(1 + "a")')
+
+    text = '\n'.join([
+        f'import("{module.as_posix()}")',
+        f'import("{module.as_posix()}")',
+        'show(sides)',
+        'show(area(3))',
+    ])
+    assert run_program(capsys, text, engine) == 'loading\n4\n9\n'
+
+    value, error = swiftcode.run('<test>', f'import("{broken.as_posix()}")', engine=engine, cache=False)
+    assert 'Failed to finish executing module' in error.as_string()
+
+
+def test_tail_calls_run_in_constant_stack(capsys, monkeypatch):
+    # Far fewer frames than the calls below need, so only tail calls can finish them
+    monkeypatch.setattr(swiftcode, 'VM_STACK_QUOTA', 100 * swiftcode.VM_FRAME_COST)
+    text = '\n'.join([
+        'funct helper(n, acc)',
+        '    if n == 0 then give acc',
+        '    give helper(n - 1, acc + 1)',
+        'finish',
+        'show(helper(5000, 0))',
+        'funct loop(n) -> if n <= 0 then 0 else loop(n - 1)',
+        'show(loop(5000))',
+        'funct given(n)',
+        '    give if n <= 0 then "given" else given(n - 1)',
+        'finish',
+        'show(given(5000))',
+        'funct even(n) -> if n == 0 then true else odd(n - 1)',
+        'funct odd(n) -> if n == 0 then false else even(n - 1)',
+        'show(even(5001))',
+        'funct last(n) -> if n <= 0 then lenl([1, 2]) else last(n - 1)',
+        'show(last(5000))',
+    ])
+    for optimize in [0, 2]:
+        assert_same_output(capsys, text, '5000\n0\ngiven\n0\n2\n', optimize)
+
+
+def test_non_tail_recursion_reports_the_depth_error(capsys, monkeypatch):
+    monkeypatch.setattr(swiftcode, 'VM_STACK_QUOTA', 100 * swiftcode.VM_FRAME_COST)
+    text = 'funct deep(n) -> if n <= 0 then 0 else deep(n - 1) + 1\ndeep(5000)'
+    for engine in ENGINES:
+        value, error = swiftcode.run('<test>', text, engine=engine, cache=False)
+        assert 'Maximum recursion depth exceeded' in error.as_string(), engine
+
+
+def test_memo_agrees_across_engines(capsys):
+    text = '\n'.join([
+        'funct fib(n)',
+        '    if n < 2 then give n',
+        '    give fib(n - 1) + fib(n - 2)',
+        'finish',
+        'variable fib = memo(fib)',
+        'show(fib(60))',
+        'show(memostats(fib))',
+        'funct paths(r, c) -> if r == 0 or c == 0 then 1 else paths(r - 1, c) + paths(r, c - 1)',
+        'variable paths = memo(paths)',
+        'show(paths(12, 12))',
+        'funct pair(xs) -> [xs, 1]',
+        'variable pair = memo(pair)',
+        'variable first = pair([1, 2])',
+        'add(first, 5)',
+        'show(pair([1, 2]))',
+        'show(memostats(pair))',
+    ])
+    for optimize in [0, 2]:
+        assert_same_output(capsys, text, '1548008755920\n58, 61, 61\n2704156\n1, 2, 1\n1, 1, 1\n', optimize)
+
+    for engine in ENGINES:
+        value, error = swiftcode.run('<test>', 'memostats(show)', engine=engine, cache=False)
+        assert 'Argument must be a function returned by memo()!' in error.as_string(), engine
+
+
+def test_memo_evicts_the_least_recently_used(capsys, monkeypatch):
+    monkeypatch.setattr(swiftcode, 'MEMO_CACHE_SIZE', 2)
+    text = '\n'.join([
+        'funct square(n) -> n * n',
+        'variable square = memo(square)',
+        'square(1)',
+        'square(2)',
+        'square(1)',
+        'square(3)',
+        'square(1)',
+        'square(2)',
+        'show(memostats(square))',
+    ])
+    assert_same_output(capsys, text, '2, 4, 2\n')
+
+
+def test_builtins_agree_across_engines(capsys):
+    text = '\n'.join([
+        'variable items = [1, 2]',
+        'add(items, 3)',
+        'extend(items, [4, 5])',
+        'show(remove(items, 0))',
+        'show(items)',
+        'show(lenl(items))',
+        'show(isnum(1))',
+        'show(isnum("a"))',
+        'show(isstr("a"))',
+        'show(islist(items))',
+        'funct f() -> 1',
+        'show(isfunct(f))',
+        'show(isfunct(show))',
+        'show(isfunct(1))',
+    ])
+    for optimize in [0, 2]:
+        assert_same_output(capsys, text, '1\n2, 3, 4, 5\n4\n1\n0\n1\n1\n1\n1\n0\n', optimize)
+
+
+def test_builtin_errors_name_the_builtin(capsys):
+    programs = {
+        'add(1, 2)': 'First argument must be a list',
+        'lenl()': "1 not enough arguments passed into 'len'",
+        'lenl([1], 2)': "1 too many arguments passed into 'len'",
+        'remove([1], 5)': 'index is out of bounds',
+        'funct f(l) -> lenl(l)\nf(3)': 'Argument must be a list!',
+    }
+    for text, message in programs.items():
+        errors = set()
+        for engine in ENGINES:
+            value, error = swiftcode.run('<test>', text, engine=engine, cache=False)
+            errors.add(error.as_string())
+        assert len(errors) == 1, errors
+        assert message in errors.pop()
+    capsys.readouterr()
+
+
+def test_folding_keeps_results_and_errors(capsys):
+    text = '\n'.join([
+        'show(2 * 3 + 4)',
+        'show("ab" + "cd")',
+        'show(if 1 then "kept" else 1 / 0)',
+        'show(if 0 then 1 / 0 ifnot 1 then "second" else "never")',
+        'variable pimat = 3',
+        'show(pimat * 2)',
+    ])
+    for optimize in [0, 1, 2]:
+        assert_same_output(capsys, text, '10\nabcd\nkept\nsecond\n6\n', optimize)
+
+    errors = set()
+    for engine in ENGINES:
+        for optimize in [0, 1, 2]:
+            value, error = swiftcode.run('<test>', 'show(1)\nshow(10 / (5 - 5))', engine=engine, cache=False, optimize=optimize)
+            errors.add(error.as_string())
+    assert len(errors) == 1
+    assert 'Division by zero is not possible!' in errors.pop()
+    assert capsys.readouterr().out == '1\n' * len(ENGINES) * 3
+
+
+def test_inlined_functions_keep_their_tracebacks(capsys):
+    text = '\n'.join([
+        'funct half(n) -> n / 2',
+        'funct twice(n) -> n * 2',
+        'show(twice(half(10)))',
+        'variable x = 4',
+        'show(twice(x) + half(x))',
+    ])
+    for optimize in [0, 2]:
+        assert_same_output(capsys, text, '10.0\n10.0\n', optimize)
+
+    failing = 'funct ratio(a, b) -> a / b\nvariable zero = 0\nshow(ratio(1, zero))'
+    errors = set()
+    for engine in ENGINES:
+        for optimize in [0, 2]:
+            value, error = swiftcode.run('<test>', failing, engine=engine, cache=False, optimize=optimize)
+            errors.add(error.as_string())
+    assert len(errors) == 1
+    assert 'in\x1b[0m ratio' in errors.pop()